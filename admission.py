@@ -0,0 +1,165 @@
+"""
+Admission control for the expensive endpoints.
+
+- Per-client token buckets: each policy allows a client RATE requests per
+  PERIOD, in bursts of up to RATE. A client is the session's user, or the IP
+  address for anonymous requests. A client over its limit gets 429, with a
+  Retry-After of when its next token arrives.
+- A global cap on pipelines (scrape + match) running inline or streaming in
+  this process. Past ADMISSION_MAX_PIPELINES, requests are shed straight away
+  with 503 and Retry-After, instead of queueing on the worker threads.
+  ?async=1 tasks are already bounded by the TaskQueue (tasks.py).
+
+Limits are per process: with WEB_WORKERS=N, a client can get N times its rate.
+Both keep counters, which /metrics exposes so the limits can be tuned.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(spec):
+    """
+    Read a rate like '10/minute', or '10/30s' for 10 per 30 seconds.
+
+    Returns:
+        tuple: (requests, period_seconds), or None for 'off', 'none' or ''
+    """
+    spec = (spec or '').strip().lower()
+    if spec in ('', 'off', 'none', '0'):
+        return None
+    count, _, period = spec.partition('/')
+    period = period.strip() or 'minute'
+    seconds = PERIODS.get(period.rstrip('s'), None)
+    if seconds is None:
+        seconds = float(period.rstrip('s'))
+    return float(count), float(seconds)
+
+
+# Requests per client (see .env.example); 'off' disables a policy
+RATES = {
+    'recommend': parse_rate(os.getenv('RATE_LIMIT_RECOMMEND', '12/minute')),
+    'cv': parse_rate(os.getenv('RATE_LIMIT_CV', '6/minute')),
+    'batch': parse_rate(os.getenv('RATE_LIMIT_BATCH', '2/minute')),
+    'export': parse_rate(os.getenv('RATE_LIMIT_EXPORT', '20/minute')),
+}
+# Clients remembered per policy; the least recently seen are forgotten first
+MAX_CLIENTS = int(os.getenv('RATE_LIMIT_MAX_CLIENTS', '10000'))
+MAX_PIPELINES = int(os.getenv('ADMISSION_MAX_PIPELINES', '8'))
+# Retry-After sent when a request is shed
+SHED_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', '5'))
+
+
+class RateLimiter:
+    """Token bucket per client: ``rate`` requests per ``period`` seconds, in bursts of up to ``rate``."""
+
+    def __init__(self, rate, period, max_clients=MAX_CLIENTS):
+        self.capacity = rate
+        self.refill = rate / period  # Tokens per second
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> [tokens, updated_at]
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def acquire(self, client, cost=1):
+        """
+        Take ``cost`` tokens from the client's bucket.
+
+        Returns:
+            float: 0 if the request may go ahead, else seconds until it would be allowed
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.capacity, now]
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            return (cost - bucket[0]) / self.refill
+
+    def stats(self):
+        with self._lock:
+            return {'allowed': self.allowed, 'limited': self.limited, 'clients': len(self._buckets)}
+
+
+class ConcurrencyLimit:
+    """At most ``limit`` holders at once; try_acquire() never waits."""
+
+    def __init__(self, limit=MAX_PIPELINES):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self.admitted = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.limit and self.in_flight >= self.limit:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': self.in_flight, 'limit': self.limit, 'peak': self.peak,
+                    'admitted': self.admitted, 'shed': self.shed}
+
+
+limiters = {policy: RateLimiter(*rate) for policy, rate in RATES.items() if rate}
+pipelines = ConcurrencyLimit()
+
+
+def check(policy, client, cost=1):
+    """Seconds the client must wait before ``policy`` admits it (0 = go ahead, also when the policy is off)."""
+    limiter = limiters.get(policy)
+    return limiter.acquire(client, cost) if limiter else 0.0
+
+
+def render_metrics():
+    """Admission counters in the Prometheus text format."""
+    lines = [
+        "# HELP neuronix_rate_limit_requests_total Requests checked against each rate limit",
+        "# TYPE neuronix_rate_limit_requests_total counter",
+    ]
+    clients = []
+    for policy, limiter in sorted(limiters.items()):
+        stats = limiter.stats()
+        lines.append(f'neuronix_rate_limit_requests_total{{policy="{policy}",outcome="allowed"}} {stats["allowed"]}')
+        lines.append(f'neuronix_rate_limit_requests_total{{policy="{policy}",outcome="limited"}} {stats["limited"]}')
+        clients.append(f'neuronix_rate_limit_clients{{policy="{policy}"}} {stats["clients"]}')
+    lines += ["# HELP neuronix_rate_limit_clients Clients with a token bucket",
+              "# TYPE neuronix_rate_limit_clients gauge"] + clients
+
+    stats = pipelines.stats()
+    for name, kind, description, value in (
+        ('neuronix_pipelines_in_flight', 'gauge', 'Pipelines running inline or streaming', stats['in_flight']),
+        ('neuronix_pipelines_limit', 'gauge', 'ADMISSION_MAX_PIPELINES (0 = no cap)', stats['limit']),
+        ('neuronix_pipelines_peak', 'gauge', 'Most pipelines in flight at once since start', stats['peak']),
+        ('neuronix_pipelines_admitted_total', 'counter', 'Pipelines admitted', stats['admitted']),
+        ('neuronix_pipelines_shed_total', 'counter', 'Requests shed with 503 at the pipeline cap', stats['shed']),
+    ):
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines)
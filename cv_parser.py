@@ -1,7 +1,113 @@
+import atexit
+import io
+import logging
+import multiprocessing
 import re
 import os
-from PyPDF2 import PdfReader
-import docx
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# Uploads larger than this are rejected before they are parsed
+MAX_CV_BYTES = int(float(os.getenv('CV_MAX_UPLOAD_MB', '5')) * 1024 * 1024)
+
+# What each supported format's bytes start with; anything else is rejected unparsed
+SIGNATURES = {'.pdf': b'%PDF-', '.docx': b'PK\x03\x04'}
+
+# Pages of a PDF read at most; the rest of a long portfolio adds little to a profile
+MAX_PAGES = int(os.getenv('CV_MAX_PAGES', '20'))
+# Stop reading once the pages so far give an email, a job title and this many skills (0 = read every page)
+ENOUGH_SKILLS = int(os.getenv('CV_ENOUGH_SKILLS', '8'))
+# PDFs with at least this many pages (within MAX_PAGES) are extracted by a process pool
+PARALLEL_MIN_PAGES = int(os.getenv('CV_PARALLEL_MIN_PAGES', '8'))
+PDF_WORKERS = int(os.getenv('CV_PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Pages per pool task. Each task re-reads the PDF's structure, so fewer, larger
+# tasks cost less; smaller ones let an early stop skip more of the work
+PAGES_PER_TASK = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class CVTooLarge(ValueError):
+    """The upload is over MAX_CV_BYTES."""
+
+    def __init__(self, max_bytes=MAX_CV_BYTES):
+        limit = f"{max_bytes / (1024 * 1024):.3g} MB" if max_bytes >= 1024 * 1024 else f"{max_bytes // 1024} KB"
+        super().__init__(f"CV is larger than {limit}")
+
+
+def read_upload(stream, max_bytes=MAX_CV_BYTES):
+    """
+    Read an uploaded file into memory, refusing it once it passes ``max_bytes``.
+
+    Args:
+        stream: binary file-like object (e.g. an upload's .stream)
+        max_bytes: size cap
+
+    Returns:
+        bytes: the file's contents
+    """
+    content = stream.read(max_bytes + 1)
+    if len(content) > max_bytes:
+        raise CVTooLarge(max_bytes)
+    return content
+
+
+def _extract_page_range(data, start, stop):
+    """Text of pages [start, stop) of a PDF given as bytes (runs in a pool process)."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _pdf_pool():
+    """The process pool for page extraction, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Never fork: the server's threads (log writer, search writer, task
+            # workers) are already running, and a forked child could inherit a
+            # lock one of them held. forkserver forks from a clean single-threaded
+            # process on Linux; elsewhere the platform default is spawn. Either
+            # way a worker imports __main__ again (server.py when run directly)
+            context = multiprocessing.get_context('forkserver' if sys.platform.startswith('linux') else None)
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _pdf_bytes(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if isinstance(source, io.BytesIO):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+class _Signal:
+    """Whether the pages read so far already give an email, a job title and ``enough_skills`` skills."""
+
+    def __init__(self, parser, enough_skills=None):
+        self.parser = parser
+        self.enough_skills = ENOUGH_SKILLS if enough_skills is None else enough_skills
+        self.email = False
+        self.title = False
+        self.skills = set()
+
+    def add(self, page_text):
+        """Take in one more page; True once there is enough to stop reading."""
+        if not self.enough_skills:
+            return False
+        self.email = self.email or self.parser.extract_email(page_text) is not None
+        self.title = self.title or self.parser.extract_job_title(page_text) != "Unknown"
+        self.skills.update(self.parser.extract_skills(page_text))
+        return self.email and self.title and len(self.skills) >= self.enough_skills
+
 
 class CVParser:
     def __init__(self):
@@ -29,27 +135,63 @@ class CVParser:
             "system administrator", "network engineer", "cyber security analyst"
         ]
 
-    def extract_text_from_pdf(self, file_path):
-        """Extract text from a PDF file."""
-        text = ""
+    def extract_text_from_pdf(self, source, max_pages=None):
+        """
+        Extract text from a PDF (a path or binary file-like object).
+        
+        Reads at most ``max_pages`` pages (default MAX_PAGES), in order, and stops
+        early once they give enough signal (see ENOUGH_SKILLS). The first
+        PAGES_PER_TASK pages, where a CV's contact details and title usually are,
+        are read here. If at least PARALLEL_MIN_PAGES pages remain, a process
+        pool extracts them.
+        """
+        from PyPDF2 import PdfReader  # Loaded on first CV upload, not at import
+        budget = MAX_PAGES if max_pages is None else max_pages
+        pages = []
         try:
-            reader = PdfReader(file_path)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            reader = PdfReader(source)
+            page_count = min(len(reader.pages), budget)
+            signal = _Signal(self)
+            for i in range(page_count):
+                if (i == PAGES_PER_TASK and PDF_WORKERS > 1
+                        and page_count - i >= PARALLEL_MIN_PAGES):
+                    pages += self._extract_pages_parallel(_pdf_bytes(source), i, page_count, signal)
+                    break
+                pages.append(reader.pages[i].extract_text())
+                if signal.add(pages[-1]):
+                    break
         except Exception as e:
-            print(f"Error reading PDF: {e}")
-        return text
+            log.warning("Error reading PDF: %s", e)
+        return "".join(f"{page}\n" for page in pages)
 
-    def extract_text_from_docx(self, file_path):
-        """Extract text from a DOCX file."""
-        text = ""
+    def _extract_pages_parallel(self, data, first, page_count, signal):
+        """Texts of pages [first, page_count) in order, from PAGES_PER_TASK-page tasks submitted PDF_WORKERS at a time."""
+        pool = _pdf_pool()
+        ranges = [(start, min(start + PAGES_PER_TASK, page_count))
+                  for start in range(first, page_count, PAGES_PER_TASK)]
+        pages = []
+        for wave in range(0, len(ranges), PDF_WORKERS):
+            futures = [pool.submit(_extract_page_range, data, start, stop)
+                       for start, stop in ranges[wave:wave + PDF_WORKERS]]
+            for future in futures:
+                for text in future.result():
+                    pages.append(text)
+                    if signal.add(text):
+                        for pending in futures:
+                            pending.cancel()
+                        return pages
+        return pages
+
+    def extract_text_from_docx(self, source):
+        """Extract text from a DOCX (a path or binary file-like object)."""
+        import docx  # Loaded on first CV upload, not at import
+        paragraphs = []
         try:
-            doc = docx.Document(file_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
+            doc = docx.Document(source)
+            paragraphs = [para.text for para in doc.paragraphs]
         except Exception as e:
-            print(f"Error reading DOCX: {e}")
-        return text
+            log.warning("Error reading DOCX: %s", e)
+        return "".join(f"{text}\n" for text in paragraphs)
 
     def extract_email(self, text):
         """Extract email address from text."""
@@ -84,17 +226,33 @@ class CVParser:
                 return title.title() # Return capitalized
         return "Unknown"
 
-    def parse(self, file_path):
-        """Main method to parse a CV file."""
-        ext = os.path.splitext(file_path)[1].lower()
-        text = ""
+    def parse(self, source, filename=None):
+        """
+        Main method to parse a CV.
+        
+        Args:
+            source: a file path, the file's bytes, or a binary file-like object
+            filename: the uploaded file's name, for its extension (defaults to the path)
+        
+        Returns:
+            dict: extracted fields, or {"error"} if no text could be extracted
+        """
+        if isinstance(source, (str, os.PathLike)):
+            filename = filename or os.fspath(source)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            # BytesIO over a bytes object shares its buffer instead of copying it
+            source = io.BytesIO(source)
+        
+        ext = os.path.splitext(filename or '')[1].lower()
+        if ext not in SIGNATURES:
+            raise ValueError(f"Unsupported file format: {ext}")
+        if not self._starts_with(source, SIGNATURES[ext]):
+            raise ValueError(f"File is not a valid {ext[1:].upper()} document")
         
         if ext == '.pdf':
-            text = self.extract_text_from_pdf(file_path)
-        elif ext == '.docx':
-            text = self.extract_text_from_docx(file_path)
+            text = self.extract_text_from_pdf(source)
         else:
-            raise ValueError(f"Unsupported file format: {ext}")
+            text = self.extract_text_from_docx(source)
             
         if not text:
             return {
@@ -109,6 +267,16 @@ class CVParser:
             "raw_text": text[:1000] + "..." # Preview
         }
 
+    @staticmethod
+    def _starts_with(source, signature):
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return f.read(len(signature)) == signature
+        start = source.tell()
+        head = source.read(len(signature))
+        source.seek(start)
+        return head == signature
+
 # Usage example
 if __name__ == "__main__":
     parser = CVParser()
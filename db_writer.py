@@ -0,0 +1,136 @@
+"""
+Write-behind persistence for search history.
+
+The recommendation endpoints hand each search and its matched jobs to a
+SearchWriter. It assigns the search_id and job_result_ids straight away and
+writes the rows on a background thread, batching several requests into one
+transaction, so response latency no longer includes SQLite commits.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+import database as db
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', '50'))
+FLUSH_INTERVAL = int(os.getenv('DB_WRITE_FLUSH_INTERVAL_MS', '200')) / 1000
+ID_BLOCK_SIZE = int(os.getenv('DB_ID_BLOCK_SIZE', '256'))
+
+_STOP = object()
+
+
+class IdAllocator:
+    """Hands out ids for a table from blocks reserved with database.reserve_ids."""
+
+    def __init__(self, table, block_size=ID_BLOCK_SIZE):
+        self.table = table
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._available = []
+
+    def allocate(self, count=1):
+        """Return ``count`` ids, reserving a new block when the current one runs out."""
+        with self._lock:
+            if len(self._available) < count:
+                self._available.extend(db.reserve_ids(self.table, max(self.block_size, count)))
+            ids = self._available[:count]
+            del self._available[:count]
+            return ids
+
+    def top_up(self):
+        """Reserve the next block early, so allocate() rarely has to touch the database."""
+        with self._lock:
+            if len(self._available) < self.block_size // 2:
+                self._available.extend(db.reserve_ids(self.table, self.block_size))
+
+
+class SearchWriter:
+    """Background thread that persists searches and job results in batches."""
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._search_ids = IdAllocator('searches')
+        # A search stores ~20 results (scrape_jobs' default max_jobs)
+        self._result_ids = IdAllocator('search_results', block_size=ID_BLOCK_SIZE * 20)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='search-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id, search_type, query_data, keywords, jobs):
+        """
+        Queue a search for writing.
+
+        Returns:
+            tuple: (search_id, job_result_ids) - valid immediately, rows land
+                   within ``flush_interval``
+        """
+        if self._closed:
+            raise RuntimeError("SearchWriter is closed")
+
+        search_id = self._search_ids.allocate(1)[0]
+        job_result_ids = self._result_ids.allocate(len(jobs)) if jobs else []
+        self._queue.put({
+            'search_id': search_id,
+            'user_id': user_id,
+            'search_type': search_type,
+            'query_data': query_data,
+            'keywords': keywords,
+            'jobs': list(jobs),
+            'job_result_ids': job_result_ids
+        })
+        return search_id, job_result_ids
+
+    def flush(self):
+        """Block until everything submitted so far has been written."""
+        self._queue.join()
+
+    def pending(self):
+        """Searches submitted but not yet written."""
+        return self._queue.qsize()
+
+    def close(self):
+        """Write pending searches and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            # Give concurrent requests up to flush_interval to join this batch
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                db.save_search_batch(batch)
+                self._search_ids.top_up()
+                self._result_ids.top_up()
+            except Exception:
+                log.exception("✗ Failed to write %d searches", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -1,3 +1,4 @@
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -7,6 +8,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 # Email configuration
 SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
@@ -165,21 +168,16 @@ def send_password_reset_email(to_email, reset_token, user_name=None):
                 server.starttls()
                 server.login(SMTP_USERNAME, SMTP_PASSWORD)
                 server.send_message(message)
-            print(f"✓ Password reset email sent to {to_email}")
+            log.info("✓ Password reset email sent to %s", to_email)
             return True
         else:
-            # No SMTP configured - print to console for development
-            print("\n" + "="*80)
-            print("📧 EMAIL SIMULATION (No SMTP configured)")
-            print("="*80)
-            print(f"To: {to_email}")
-            print(f"Subject: {subject}")
-            print(f"\nReset Link: {reset_link}")
-            print("="*80 + "\n")
+            # No SMTP configured - log the link for development
+            log.info("📧 EMAIL SIMULATION (No SMTP configured) To: %s Subject: %s Reset Link: %s",
+                     to_email, subject, reset_link)
             return True
             
     except Exception as e:
-        print(f"✗ Failed to send email: {str(e)}")
+        log.error("✗ Failed to send email: %s", e)
         return False
 
 def send_welcome_email(to_email, user_name):
@@ -292,12 +290,12 @@ def send_welcome_email(to_email, user_name):
                 server.starttls()
                 server.login(SMTP_USERNAME, SMTP_PASSWORD)
                 server.send_message(message)
-            print(f"✓ Welcome email sent to {to_email}")
+            log.info("✓ Welcome email sent to %s", to_email)
             return True
         else:
-            print(f"📧 Welcome email simulated for {to_email}")
+            log.info("📧 Welcome email simulated for %s", to_email)
             return True
             
     except Exception as e:
-        print(f"✗ Failed to send welcome email: {str(e)}")
+        log.error("✗ Failed to send welcome email: %s", e)
         return False
@@ -0,0 +1,126 @@
+"""
+Response compression and HTTP cache validation for the Flask app.
+
+- JSON and text responses of at least COMPRESS_MIN_BYTES are compressed with
+  brotli (when the optional brotli package is installed) or gzip, whichever
+  the client prefers in Accept-Encoding.
+- Views decorated with @conditional, and files from the static folder, get a
+  strong ETag over the bytes actually sent, and If-None-Match is answered with
+  304 Not Modified. Compression happens first, so each encoding has its own ETag.
+- Fingerprinted static files (``?v=<hash>`` or ``name.<hash>.css``) and
+  uploaded profile photos (a new name per upload) are cached for a year.
+  Every other static file is revalidated on each use.
+
+Streamed responses (SSE, NDJSON) are never buffered or compressed.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+from functools import wraps
+
+from flask import request, make_response
+
+import tracing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'text/javascript', 'text/css',
+    'text/html', 'text/plain', 'image/svg+xml',
+}
+# In order of preference when the client accepts both equally
+ENCODINGS = ['br', 'gzip'] if brotli else ['gzip']
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+FINGERPRINTED = re.compile(r'\.[0-9a-f]{8,}\.\w+$')
+IMMUTABLE_PATHS = ('uploads/profiles/',)
+
+_VALIDATE = '_validate_etag'
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output (and so the ETag) the same for the same body
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def conditional(view):
+    """Give a view's 200 responses a strong ETag and answer If-None-Match with 304."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            setattr(response, _VALIDATE, True)
+            # User data: browsers may keep it, but must check it's still current
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+
+def static_file(response, path):
+    """
+    Cache headers for a file served from the static folder.
+
+    Args:
+        response: the send_from_directory response
+        path: the requested path, relative to the static folder
+
+    Returns:
+        The same response
+    """
+    if response.status_code not in (200, 304):
+        return response
+    if FINGERPRINTED.search(path) or request.args.get('v') or path.startswith(IMMUTABLE_PATHS):
+        response.cache_control.no_cache = None  # send_file's default
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    setattr(response, _VALIDATE, True)
+    return response
+
+
+def finalize_response(response):
+    """after_request hook: compress the body, then set the ETag and answer conditional requests."""
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+
+    compressible = response.mimetype in COMPRESSIBLE_TYPES
+    if compressible:
+        response.vary.add('Accept-Encoding')
+
+    from_file = response.direct_passthrough  # send_file / send_from_directory
+    if from_file and not compressible:
+        return response  # Images and PDFs keep send_file's own ETag and 304 handling
+    if response.is_streamed and not from_file:
+        return response  # SSE and NDJSON go out as they're produced
+
+    response.direct_passthrough = False  # Static text files are small; read them to compress
+    data = response.get_data()
+    encoding = request.accept_encodings.best_match(ENCODINGS) if compressible else None
+    if encoding and len(data) >= COMPRESS_MIN_BYTES:
+        with tracing.span('compress', encoding=encoding):
+            data = compress(data, encoding)
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+
+    if getattr(response, _VALIDATE, False):
+        response.set_etag(hashlib.sha256(data).hexdigest()[:32])
+        response.make_conditional(request)
+    return response
+
+
+def init_app(app):
+    app.after_request(finalize_response)
@@ -0,0 +1,104 @@
+"""
+Import-time profile: what a worker pays to start, by package.
+
+Usage:
+    python import_profile.py               # profile `import server`
+    python import_profile.py matcher 15    # another module, top 15 rows
+    python import_profile.py server --lazy # also time each lazily loaded path (WEB_PRELOAD names)
+
+Runs the import in a fresh interpreter with `python -X importtime` and sums the
+self time of every module by top-level package.
+"""
+
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def profile_import(module):
+    """
+    Import ``module`` in a new interpreter.
+
+    Returns:
+        tuple: (wall-clock ms, [(self_us, cumulative_us, depth, name), ...] in import order)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    return elapsed, rows
+
+
+def by_package(rows):
+    """Total self time (us) and module count per top-level package."""
+    totals = defaultdict(lambda: [0, 0])
+    for self_us, _, _, name in rows:
+        package = totals[name.split('.')[0]]
+        package[0] += self_us
+        package[1] += 1
+    return sorted(((name, us, count) for name, (us, count) in totals.items()), key=lambda t: -t[1])
+
+
+def print_report(module, top=10):
+    elapsed, rows = profile_import(module)
+    total_us = sum(r[0] for r in rows)
+
+    print(f"\nIMPORT {module}: {elapsed:.0f} ms wall clock, {total_us / 1000:.0f} ms importing {len(rows)} modules")
+    print("-" * 80)
+    print(f"  {'package':<32}{'ms':>10}{'share':>10}{'modules':>10}")
+    for name, us, count in by_package(rows)[:top]:
+        print(f"  {name:<32}{us / 1000:>10.1f}{us / total_us:>10.0%}{count:>10}")
+
+    # What the module itself pulls in directly (depth 0 is the module itself)
+    depth = next((d for _, _, d, name in rows if name == module), 0)
+    direct = [r for r in rows if r[2] == depth + 1]
+    print(f"\n  Slowest direct imports of {module}:")
+    for _, cumulative_us, _, name in sorted(direct, key=lambda r: -r[1])[:top]:
+        print(f"  {name:<32}{cumulative_us / 1000:>10.1f}")
+
+
+def print_lazy_report():
+    """Time each lazily loaded path of server.py, as a worker's first request would pay it."""
+    print("\nFIRST USE OF LAZY PATHS (server.warm_up):")
+    print("-" * 80)
+    result = subprocess.run(
+        [sys.executable, '-c', "import server; server.warm_up(list(server.PRELOADERS))"],
+        capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith(("✓ Preloaded", "⚠")):
+            print(f"  {line}")
+    if result.returncode != 0:
+        print(f"✗ {result.stderr.strip().splitlines()[-1]}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    module = args[0] if args else 'server'
+    top = int(args[1]) if len(args) > 1 else 10
+
+    print("=" * 80)
+    print(" " * 22 + "NEURONIX AI JOBFLOW - IMPORT PROFILE")
+    print("=" * 80)
+    try:
+        print_report(module, top)
+    except RuntimeError as e:
+        print(f"✗ import {module} failed: {e}")
+        sys.exit(1)
+    if '--lazy' in sys.argv:
+        print_lazy_report()
@@ -0,0 +1,141 @@
+"""
+Load test for a running server, against its real routes.
+
+Usage:
+    python loadtest.py                                  # localhost:5000, 32 users, 30 s
+    python loadtest.py --url http://host:5000 --users 64 --duration 60
+    python loadtest.py --routes search,recommend        # recommend scrapes the real boards
+
+Each simulated user keeps one keep-alive connection and cycles through the
+chosen routes without think time, so the report shows the server's ceiling:
+requests/sec and latency percentiles per route, plus status codes.
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+# name -> (method, path, JSON body)
+ROUTES = {
+    'index': ('GET', '/', None),
+    'search': ('GET', '/api/jobs/search?q=python+developer&limit=20', None),
+    'history': ('GET', '/api/user/searches?user_id={user_id}&limit=10', None),
+    'results': ('GET', '/api/search/{search_id}/results?limit=20', None),
+    'saved': ('GET', '/api/user/saved-jobs?user_id={user_id}&limit=20', None),
+    # Queued, so this measures admission (202 / 429), not scraping
+    'recommend': ('POST', '/api/recommend/chat?async=1', {'message': 'python developer'}),
+}
+DEFAULT_ROUTES = 'index,search,history,results,saved'
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_user(base, routes, deadline, results, lock):
+    """One simulated user: send requests back to back until the deadline."""
+    conn_class = http.client.HTTPSConnection if base.scheme == 'https' else http.client.HTTPConnection
+    conn = conn_class(base.netloc, timeout=30)
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    n = 0
+
+    while time.monotonic() < deadline:
+        name, (method, path, body) = routes[n % len(routes)]
+        n += 1
+        headers = {'Accept-Encoding': 'gzip'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            statuses[name][response.status] += 1
+        except Exception as e:
+            statuses[name][type(e).__name__] += 1
+            conn.close()  # Reconnects on the next request
+            continue
+        latencies[name].append((time.perf_counter() - start) * 1000)
+
+    conn.close()
+    with lock:
+        for name, samples in latencies.items():
+            results['latencies'][name].extend(samples)
+        for name, counts in statuses.items():
+            results['statuses'][name].update(counts)
+
+
+def run_load_test(url, route_names, users, duration, user_id=1, search_id=1):
+    """
+    Returns:
+        dict: {'latencies': {route: [ms, ...]}, 'statuses': {route: Counter}, 'elapsed': seconds}
+    """
+    base = urlsplit(url)
+    routes = []
+    for name in route_names:
+        method, path, body = ROUTES[name]
+        routes.append((name, (method, path.format(user_id=user_id, search_id=search_id), body)))
+
+    results = {'latencies': defaultdict(list), 'statuses': defaultdict(Counter)}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    # Stagger route order so users don't all hit the same route at once
+    threads = [
+        threading.Thread(target=run_user, args=(base, routes[i % len(routes):] + routes[:i % len(routes)],
+                                                deadline, results, lock), daemon=True)
+        for i in range(users)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results['elapsed'] = time.perf_counter() - start
+    return results
+
+
+def print_report(results):
+    elapsed = results['elapsed']
+    total = sum(sum(c.values()) for c in results['statuses'].values())
+    print(f"\n{'route':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}   statuses")
+    print("-" * 80)
+    for name, counts in sorted(results['statuses'].items()):
+        samples = results['latencies'].get(name) or [0]
+        status_text = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items(), key=str))
+        print(f"{name:<12}{sum(counts.values()) / elapsed:>10.1f}{percentile(samples, 50):>10.1f}"
+              f"{percentile(samples, 95):>10.1f}{percentile(samples, 99):>10.1f}   {status_text}")
+    print("-" * 80)
+    print(f"{'total':<12}{total / elapsed:>10.1f}   ({total} requests in {elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a running Neuronix AI JobFlow server")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--users', type=int, default=32, help="concurrent connections")
+    parser.add_argument('--duration', type=float, default=30, help="seconds")
+    parser.add_argument('--routes', default=DEFAULT_ROUTES, help=f"comma-separated: {', '.join(ROUTES)}")
+    parser.add_argument('--user-id', type=int, default=1, help="user for history/saved routes")
+    parser.add_argument('--search-id', type=int, default=1, help="search for the results route")
+    args = parser.parse_args()
+
+    route_names = [r.strip() for r in args.routes.split(',') if r.strip()]
+    unknown = [r for r in route_names if r not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    print("=" * 80)
+    print(" " * 22 + "NEURONIX AI JOBFLOW - LOAD TEST")
+    print("=" * 80)
+    print(f"Target: {args.url} | {args.users} users | {args.duration:.0f} s | routes: {', '.join(route_names)}")
+
+    print_report(run_load_test(args.url, route_names, args.users, args.duration, args.user_id, args.search_id))
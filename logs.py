@@ -0,0 +1,132 @@
+"""
+Leveled, structured logging that never writes on the request thread.
+
+Modules log through the standard library (``log = logging.getLogger(__name__)``).
+configure() installs one handler on the root logger. That handler puts each
+record on an in-memory queue. A background thread formats the records and
+writes them to stderr, so a request never waits on console I/O.
+
+- LOG_LEVEL: DEBUG shows per-board and per-search detail. INFO (the
+  development default) adds startup, migrations and per-search summaries.
+  WARNING (the default under wsgi.py) only shows problems.
+- LOG_FORMAT: 'text' gives human-readable lines. 'json' writes one object per
+  line, and adds the fields passed as ``extra=`` (board, jobs, route, ...) as keys.
+
+Entry points (server.py, wsgi.py, the modules' command lines) call
+configure(). The first call wins, so wsgi.py can pick the production default
+before server.py is imported.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+
+# LogRecord's own attributes; anything else on a record came from extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_configured = False
+_listener = None
+
+
+def fields(record):
+    """The structured fields a record was logged with (its ``extra=``)."""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and the extra= fields."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **fields(record),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queues records as they are; formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        # The stock prepare() formats the message here, on the caller's thread.
+        # Resolving the arguments is enough to make the record safe to hand over.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _output_handler():
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JSONFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT, '%H:%M:%S'))
+    return handler
+
+
+def _start():
+    """Route the root logger through a fresh queue and writer thread (also run in forked children)."""
+    global _listener
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(records))
+    # A forked child inherits the parent's listener object but not its thread
+    _listener = QueueListener(records, _output_handler())
+    _listener.start()
+
+
+def stop():
+    """Write every queued record and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure(default_level='INFO'):
+    """
+    Send all logging through the queue at LOG_LEVEL (``default_level`` when unset).
+
+    Args:
+        default_level: level used when LOG_LEVEL is not set
+
+    Returns:
+        bool: False if logging was already configured (the earlier call wins)
+    """
+    global _configured
+    if _configured:
+        return False
+    _configured = True
+
+    level = os.getenv('LOG_LEVEL', default_level).upper()
+    logging.getLogger().setLevel(level)
+    # Libraries' own request-level chatter only when asked for
+    logging.getLogger('urllib3').setLevel(max(logging.getLogger().level, logging.WARNING))
+
+    _start()
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_start)
+    atexit.register(stop)
+    return True
@@ -1,9 +1,23 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
 import numpy as np
 import re
 from collections import Counter
 
+import tracing
+
+# Weighted final score: skills are most important, then text similarity, then experience
+SCORE_WEIGHTS = {'skills': 0.50, 'text': 0.30, 'experience': 0.20}
+TITLE_BOOST = 1.15  # When the job title contains the user's desired title
+
+LEVEL_RANKS = {'entry': 0, 'mid': 1, 'senior': 2, 'principal': 3}
+# By how many levels user and job differ
+EXPERIENCE_SCORES = (100.0, 75.0, 50.0, 25.0)
+
+# Profiles scored per matrix pass in match_profiles
+PROFILE_CHUNK_SIZE = 256
+
 class EnhancedJobMatcher:
     """
     Enhanced AI-powered job matcher with multiple matching strategies:
@@ -104,11 +118,49 @@ class EnhancedJobMatcher:
         # Normalize to 0-100
         return min(100, (score / max_possible_score * 100)) if max_possible_score > 0 else 0.0
     
-    def calculate_experience_match(self, user_experience, job_description):
-        """Match experience level from job description"""
-        if not job_description:
-            return 50.0  # Neutral score if no description
-            
+    def skill_incidence(self, skill_lists):
+        """
+        Skills normalized as calculate_skill_match_score does, and how often each list has each.
+        
+        Returns:
+            tuple: (distinct skills, sparse lists x skills count matrix)
+        """
+        vocabulary = {}
+        rows, cols = [], []
+        for i, skills in enumerate(skill_lists):
+            for skill in skills:
+                if skill:
+                    rows.append(i)
+                    cols.append(vocabulary.setdefault(skill.lower().strip(), len(vocabulary)))
+        # Repeated (row, col) pairs are summed: a skill listed twice counts twice
+        counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(skill_lists), len(vocabulary)))
+        return list(vocabulary), counts
+    
+    def skill_relations(self, user_skills, job_skills):
+        """
+        How each distinct user skill relates to each distinct job skill, as sparse matrices.
+        
+        Returns:
+            tuple: (exact user x job, partial user x job, user x synonym group, job x synonym group)
+        """
+        job_index = {skill: j for j, skill in enumerate(job_skills)}
+        shape = (len(user_skills), len(job_skills))
+        exact, partial = sparse.lil_matrix(shape), sparse.lil_matrix(shape)
+        for u, user_skill in enumerate(user_skills):
+            if user_skill in job_index:
+                exact[u, job_index[user_skill]] = 1
+            for j, job_skill in enumerate(job_skills):
+                if job_skill in user_skill or user_skill in job_skill:
+                    partial[u, j] = 1
+        
+        groups = [{key, *synonyms} for key, synonyms in self.skill_synonyms.items()]
+        def membership(skills):
+            return sparse.csr_matrix(np.array([[skill in group for group in groups] for skill in skills],
+                                              dtype=float).reshape(len(skills), len(groups)))
+        return exact.tocsr(), partial.tocsr(), membership(user_skills), membership(job_skills)
+    
+    def job_experience_level(self, job_description):
+        """Experience level a job description asks for (entry, mid, senior or principal)"""
         job_desc_lower = job_description.lower()
         
         # Extract experience requirements from job description
@@ -119,13 +171,13 @@ class EnhancedJobMatcher:
             'principal': ['principal', 'staff', '10+ years', 'architect']
         }
         
-        job_level = 'mid'  # Default
         for level, patterns in experience_patterns.items():
             if any(pattern in job_desc_lower for pattern in patterns):
-                job_level = level
-                break
-        
-        # Parse user experience (assuming it's a number of years or string)
+                return level
+        return 'mid'  # Default
+    
+    def user_experience_level(self, user_experience):
+        """Experience level for a number of years (or a string like "5 years")"""
         try:
             if isinstance(user_experience, (int, float)):
                 years = user_experience
@@ -140,29 +192,24 @@ class EnhancedJobMatcher:
         
         # Determine user level based on years
         if years < 2:
-            user_level = 'entry'
+            return 'entry'
         elif years < 5:
-            user_level = 'mid'
+            return 'mid'
         elif years < 10:
-            user_level = 'senior'
+            return 'senior'
         else:
-            user_level = 'principal'
+            return 'principal'
+    
+    def calculate_experience_match(self, user_experience, job_description):
+        """Match experience level from job description"""
+        if not job_description:
+            return 50.0  # Neutral score if no description
         
-        # Calculate match score
-        level_hierarchy = {'entry': 0, 'mid': 1, 'senior': 2, 'principal': 3}
-        user_rank = level_hierarchy.get(user_level, 1)
-        job_rank = level_hierarchy.get(job_level, 1)
+        user_rank = LEVEL_RANKS[self.user_experience_level(user_experience)]
+        job_rank = LEVEL_RANKS[self.job_experience_level(job_description)]
         
         # Perfect match = 100, one level off = 75, two levels = 50, three levels = 25
-        diff = abs(user_rank - job_rank)
-        if diff == 0:
-            return 100.0
-        elif diff == 1:
-            return 75.0
-        elif diff == 2:
-            return 50.0
-        else:
-            return 25.0
+        return EXPERIENCE_SCORES[abs(user_rank - job_rank)]
     
     def calculate_text_similarity(self, user_doc, job_doc):
         """Calculate TF-IDF cosine similarity between user profile and job"""
@@ -179,6 +226,46 @@ class EnhancedJobMatcher:
         except:
             return 0.0
     
+    def profile_features(self, user_profile):
+        """The parts of a profile that scoring uses: skills, years, title and text document"""
+        user_skills = []
+        if 'skills' in user_profile:
+            if isinstance(user_profile['skills'], list):
+                user_skills = user_profile['skills']
+            else:
+                user_skills = [s.strip() for s in str(user_profile['skills']).split(',')]
+        
+        user_job_title = user_profile.get('job_title', '')
+        user_keywords = user_profile.get('keywords', '')
+        
+        # Build user document for text matching
+        user_doc = f"{user_job_title} {' '.join(user_skills)} {user_keywords}"
+        
+        # Also extract skills from user document
+        extracted_user_skills = self.extract_skills(user_doc)
+        return {
+            'skills': list(set(user_skills + extracted_user_skills)),
+            'experience': user_profile.get('experience', 0),
+            'job_title': user_job_title,
+            'doc': user_doc,
+        }
+    
+    def job_features(self, job):
+        """A job's text document and skills (listed plus extracted from its text)"""
+        job_doc = f"{job.get('title', '')} {job.get('description', '')} {' '.join(job.get('skills', []))}"
+        job_skills = job.get('skills', [])
+        return job_doc, list(set(job_skills + self.extract_skills(job_doc)))
+    
+    def scored_job(self, job, final_score, skill_match, text_similarity, experience_match, user_skills, job_skills):
+        """Create enhanced job object"""
+        enhanced_job = job.copy()
+        enhanced_job['match_score'] = round(final_score, 1)
+        enhanced_job['skill_match'] = round(skill_match, 1)
+        enhanced_job['text_similarity'] = round(text_similarity, 1)
+        enhanced_job['experience_match'] = round(experience_match, 1)
+        enhanced_job['matched_skills'] = list(set(user_skills) & set(job_skills))
+        return enhanced_job
+    
     def match_jobs(self, user_profile, jobs):
         """
         Enhanced job matching with multiple weighted factors.
@@ -193,67 +280,145 @@ class EnhancedJobMatcher:
         if not jobs:
             return []
         
-        # Extract user information
-        user_skills = []
-        if 'skills' in user_profile:
-            if isinstance(user_profile['skills'], list):
-                user_skills = user_profile['skills']
-            else:
-                user_skills = [s.strip() for s in str(user_profile['skills']).split(',')]
+        # One pass per stage, so each shows up as its own span in a request trace
+        with tracing.span('match.features'):
+            user = self.profile_features(user_profile)
+            features = [self.job_features(job) for job in jobs]
+        with tracing.span('match.text'):
+            text_scores = [self.calculate_text_similarity(user['doc'], job_doc) for job_doc, _ in features]
+        with tracing.span('match.skills'):
+            skill_scores = [self.calculate_skill_match_score(user['skills'], job_skills) for _, job_skills in features]
+        with tracing.span('match.experience'):
+            experience_scores = [self.calculate_experience_match(user['experience'], job.get('description', ''))
+                                 for job in jobs]
         
-        user_experience = user_profile.get('experience', 0)
-        user_job_title = user_profile.get('job_title', '')
-        user_keywords = user_profile.get('keywords', '')
+        with tracing.span('match.rank'):
+            ranked_jobs = []
+            for job, (_, all_job_skills), text_similarity, skill_match, experience_match in zip(
+                    jobs, features, text_scores, skill_scores, experience_scores):
+                # Weighted final score
+                # Skills are most important (50%), then text similarity (30%), then experience (20%)
+                final_score = (
+                    skill_match * SCORE_WEIGHTS['skills'] +
+                    text_similarity * SCORE_WEIGHTS['text'] +
+                    experience_match * SCORE_WEIGHTS['experience']
+                )
+                
+                # Boost score if job title matches user's desired title
+                if user['job_title'] and user['job_title'].lower() in job.get('title', '').lower():
+                    final_score = min(100, final_score * TITLE_BOOST)  # 15% boost
+                
+                ranked_jobs.append(self.scored_job(
+                    job, final_score, skill_match, text_similarity, experience_match, user['skills'], all_job_skills))
+            
+            # Sort by final match score
+            ranked_jobs.sort(key=lambda x: x['match_score'], reverse=True)
         
-        # Build user document for text matching
-        user_doc = f"{user_job_title} {' '.join(user_skills)} {user_keywords}"
+        return ranked_jobs
+    
+    def match_profiles(self, profiles, jobs, top_n=None, chunk_size=PROFILE_CHUNK_SIZE):
+        """
+        Score many profiles against one pool of jobs, with match_jobs' weights.
         
-        # Also extract skills from user document
-        extracted_user_skills = self.extract_skills(user_doc)
-        all_user_skills = list(set(user_skills + extracted_user_skills))
+        Job features and one TF-IDF model are computed once for the whole batch;
+        text similarity, skill and experience scores then come from profile x job
+        matrix operations, ``chunk_size`` profiles at a time. Skill and
+        experience scores equal match_jobs'. Text similarity uses IDF over the
+        whole pool rather than over each (profile, job) pair, so it can differ
+        slightly from match_jobs.
         
-        ranked_jobs = []
+        Args:
+            profiles: list of user profile dicts (as for match_jobs)
+            jobs: the shared job pool
+            top_n: keep only each profile's best ``top_n`` jobs
+            
+        Yields:
+            Each profile's ranked jobs, in the order of ``profiles``
+        """
+        if not jobs:
+            for _ in profiles:
+                yield []
+            return
         
-        for job in jobs:
-            # Build job document
-            job_doc = f"{job.get('title', '')} {job.get('description', '')} {' '.join(job.get('skills', []))}"
+        with tracing.span('match.features'):
+            users = [self.profile_features(p) for p in profiles]
+            job_features = [self.job_features(job) for job in jobs]
+            job_docs = [doc for doc, _ in job_features]
+            job_titles = [job.get('title', '').lower() for job in jobs]
             
-            # Extract job skills
-            job_skills = job.get('skills', [])
-            extracted_job_skills = self.extract_skills(job_doc)
-            all_job_skills = list(set(job_skills + extracted_job_skills))
+            # Experience: a lookup on |user level - job level|; jobs without a description score 50
+            job_ranks = np.array([LEVEL_RANKS[self.job_experience_level(job.get('description') or '')] for job in jobs])
+            has_description = np.array([bool(job.get('description')) for job in jobs])
+            level_scores = np.array(EXPERIENCE_SCORES)
             
-            # Calculate different match scores
-            text_similarity = self.calculate_text_similarity(user_doc, job_doc)
-            skill_match = self.calculate_skill_match_score(all_user_skills, all_job_skills)
-            experience_match = self.calculate_experience_match(user_experience, job.get('description', ''))
+            # Skills: profile x skill and job x skill incidence, related through the distinct skills
+            user_skills, user_counts = self.skill_incidence([u['skills'] for u in users])
+            job_skills, job_counts = self.skill_incidence([skills for _, skills in job_features])
+            exact, partial, user_groups, job_groups = self.skill_relations(user_skills, job_skills)
+            user_has = (user_counts > 0).astype(float)
+            max_skill_scores = np.asarray(job_counts.sum(axis=1)).ravel() * self.skill_weights['exact_match']
+        
+        with tracing.span('match.text'):
+            # Text: one vocabulary for the pool and every profile
+            try:
+                tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
+                matrix = tfidf.fit_transform(job_docs + [u['doc'] for u in users])
+                job_matrix, user_matrix = matrix[:len(jobs)], matrix[len(jobs):]
+            except ValueError:
+                user_matrix = None  # Nothing but stop words anywhere
+            empty_jobs = np.array([not doc.strip() for doc in job_docs])
+        
+        for start in range(0, len(users), chunk_size):
+            chunk = users[start:start + chunk_size]
             
-            # Weighted final score
-            # Skills are most important (50%), then text similarity (30%), then experience (20%)
-            final_score = (
-                skill_match * 0.50 +
-                text_similarity * 0.30 +
-                experience_match * 0.20
-            )
+            with tracing.span('match.text'):
+                if user_matrix is None:
+                    text = np.zeros((len(chunk), len(jobs)))
+                else:
+                    text = cosine_similarity(user_matrix[start:start + chunk_size], job_matrix) * 100
+                    text[:, empty_jobs] = 0.0
+                    text[np.array([not u['doc'].strip() for u in chunk]), :] = 0.0
             
-            # Boost score if job title matches user's desired title
-            if user_job_title and user_job_title.lower() in job.get('title', '').lower():
-                final_score = min(100, final_score * 1.15)  # 15% boost
+            with tracing.span('match.experience'):
+                user_ranks = np.array([LEVEL_RANKS[self.user_experience_level(u['experience'])] for u in chunk])
+                experience = level_scores[np.abs(user_ranks[:, None] - job_ranks[None, :])]
+                experience[:, ~has_description] = 50.0
             
-            # Create enhanced job object
-            enhanced_job = job.copy()
-            enhanced_job['match_score'] = round(final_score, 1)
-            enhanced_job['skill_match'] = round(skill_match, 1)
-            enhanced_job['text_similarity'] = round(text_similarity, 1)
-            enhanced_job['experience_match'] = round(experience_match, 1)
-            enhanced_job['matched_skills'] = list(set(all_user_skills) & set(all_job_skills))
+            with tracing.span('match.skills'):
+                # calculate_skill_match_score as matrix products: each job skill earns the exact
+                # weight, else the partial weight, else the related weight per synonym group
+                # shared with the profile; summed per job and normalized by the exact maximum
+                has = user_has[start:start + chunk_size]
+                related = ((has @ user_groups) > 0).astype(float) @ job_groups.T
+                earned = np.where(
+                    (has @ exact).toarray() > 0, self.skill_weights['exact_match'],
+                    np.where((has @ partial).toarray() > 0, self.skill_weights['partial_match'],
+                             related.toarray() * self.skill_weights['related_match']))
+                skills = np.asarray(job_counts @ earned.T).T
+                skills = np.minimum(100, np.divide(skills, max_skill_scores, out=np.zeros_like(skills),
+                                                   where=max_skill_scores > 0) * 100)
             
-            ranked_jobs.append(enhanced_job)
-        
-        # Sort by final match score
-        ranked_jobs.sort(key=lambda x: x['match_score'], reverse=True)
-        
-        return ranked_jobs
+            with tracing.span('match.rank'):
+                final = (skills * SCORE_WEIGHTS['skills'] +
+                         text * SCORE_WEIGHTS['text'] +
+                         experience * SCORE_WEIGHTS['experience'])
+                boost = np.array([
+                    [bool(u['job_title']) and u['job_title'].lower() in title for title in job_titles] for u in chunk
+                ])
+                final = np.where(boost, np.minimum(100, final * TITLE_BOOST), final)
+                
+                # Rank on the rounded score, as match_jobs does; ties keep pool order
+                order = np.argsort(-np.round(final, 1), axis=1, kind='stable')
+            
+            for i, user in enumerate(chunk):
+                # Plain floats: round() on numpy scalars costs more than all the scoring above
+                row_final, row_skills, row_text, row_experience = (
+                    scores[i].tolist() for scores in (final, skills, text, experience))
+                yield [
+                    self.scored_job(jobs[j], row_final[j], row_skills[j], row_text[j], row_experience[j],
+                                    user['skills'], job_features[j][1])
+                    for j in order[i][:top_n].tolist()
+                ]
 
 
 def match_jobs(user_profile, jobs):
@@ -265,6 +430,11 @@ def match_jobs(user_profile, jobs):
     return matcher.match_jobs(user_profile, jobs)
 
 
+def match_profiles(profiles, jobs, top_n=None):
+    """Rank one job pool for each of several profiles (see EnhancedJobMatcher.match_profiles)."""
+    return EnhancedJobMatcher().match_profiles(profiles, jobs, top_n)
+
+
 if __name__ == "__main__":
     # Test the enhanced matcher
     test_profile = {
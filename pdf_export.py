@@ -0,0 +1,191 @@
+"""
+PDF export of job recommendations, rendered once and cached on disk.
+
+A rendered PDF is stored under PDF_CACHE_DIR, named by a hash of everything
+that appears in it. The hash covers the jobs, the user name and the date, plus
+the search_id when exporting a stored search. Repeat downloads of the same
+results are served straight from that file, and concurrent requests for the
+same export wait for a single render. The cache keeps at most PDF_CACHE_MAX_MB;
+the least recently used files are removed first.
+
+reportlab is imported on first export, and the paragraph and table styles are
+built once per process.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+CACHE_DIR = Path(os.getenv('PDF_CACHE_DIR') or Path(tempfile.gettempdir()) / 'neuronix_pdf_cache')
+CACHE_MAX_BYTES = int(float(os.getenv('PDF_CACHE_MAX_MB', '200')) * 1024 * 1024)
+# Bump when the layout changes, so cached files from the old layout are not served
+LAYOUT_VERSION = 1
+
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _styles():
+    """Paragraph and table styles, built once and shared by every export."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    return {
+        'normal': styles['Normal'],
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#6366f1'),
+            spaceAfter=30,
+        ),
+        'job_title': ParagraphStyle(
+            'JobTitle',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#1e293b'),
+            spaceAfter=10,
+        ),
+        'details': TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#64748b')),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+    }
+
+
+def export_fields(job):
+    """The fields a PDF shows. Stored results (get_search_results) name the title job_title."""
+    return {
+        'title': job.get('title') or job.get('job_title') or 'N/A',
+        'company': job.get('company') or 'N/A',
+        'location': job.get('location') or 'N/A',
+        'match_score': job.get('match_score') or 0,
+        'platform': job.get('platform') or 'N/A',
+        'description': job.get('description') or 'No description available',
+        'skills': list(job.get('skills') or [])[:10],
+    }
+
+
+def render(path, jobs, user_name, generated_on):
+    """Write the PDF for ``jobs`` (export_fields dicts) to ``path``."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    styles = _styles()
+    doc = SimpleDocTemplate(str(path), pagesize=letter)
+    elements = [
+        Paragraph(f"Job Recommendations for {escape(user_name)}", styles['title']),
+        Paragraph(f"Generated on {generated_on}", styles['normal']),
+        Spacer(1, 0.3*inch),
+    ]
+
+    for idx, job in enumerate(jobs, 1):
+        # Job header
+        elements.append(Paragraph(f"{idx}. {escape(str(job['title']))}", styles['job_title']))
+
+        # Job details table
+        job_table = Table([
+            ['Company:', job['company']],
+            ['Location:', job['location']],
+            ['Match Score:', f"{job['match_score']}%"],
+            ['Platform:', job['platform']],
+        ], colWidths=[1.5*inch, 4.5*inch])
+        job_table.setStyle(styles['details'])
+        elements.append(job_table)
+        elements.append(Spacer(1, 0.1*inch))
+
+        # Description
+        desc = escape(job['description'][:300]) + '...'
+        elements.append(Paragraph(f"<b>Description:</b> {desc}", styles['normal']))
+
+        # Skills
+        if job['skills']:
+            elements.append(Paragraph(f"<b>Skills:</b> {escape(', '.join(job['skills']))}", styles['normal']))
+
+        elements.append(Spacer(1, 0.3*inch))
+
+    doc.build(elements)
+
+
+def cache_key(jobs, user_name, generated_on, search_id=None):
+    content = json.dumps([LAYOUT_VERSION, search_id, user_name, generated_on, jobs], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def get_pdf(jobs, user_name='User', search_id=None):
+    """
+    Path of the rendered PDF for these jobs, rendering it only if it isn't cached.
+
+    Args:
+        jobs: job dicts (as returned by the recommendation endpoints or get_search_results)
+        user_name: shown in the title
+        search_id: the stored search the jobs come from, if any (part of the cache key)
+
+    Returns:
+        tuple: (Path, cache_hit)
+    """
+    jobs = [export_fields(job) for job in jobs]
+    generated_on = datetime.now().strftime('%B %d, %Y')
+    key = cache_key(jobs, user_name, generated_on, search_id)
+    path = CACHE_DIR / f"{key}.pdf"
+
+    with _render_locks_guard:
+        lock = _render_locks.setdefault(key, threading.Lock())
+    with lock:
+        try:
+            if path.exists():
+                os.utime(path)  # Mark as recently used
+                return path, True
+
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # Render to a temp file and rename, so no reader (or other process) sees half a PDF
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+            os.close(fd)
+            try:
+                render(tmp_path, jobs, user_name, generated_on)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        finally:
+            with _render_locks_guard:
+                _render_locks.pop(key, None)
+
+    _trim_cache()
+    return path, False
+
+
+def _trim_cache():
+    """Delete the least recently used PDFs until the cache fits in CACHE_MAX_BYTES."""
+    try:
+        files = [(f.stat().st_mtime, f.stat().st_size, f) for f in CACHE_DIR.glob('*.pdf')]
+    except FileNotFoundError:
+        return
+    total = sum(size for _, size, _ in files)
+    for _, size, f in sorted(files):
+        if total <= CACHE_MAX_BYTES:
+            break
+        try:
+            f.unlink()
+            total -= size
+        except FileNotFoundError:
+            pass
+
+
+def clear_cache():
+    for f in CACHE_DIR.glob('*.pdf'):
+        f.unlink(missing_ok=True)
@@ -0,0 +1,274 @@
+"""
+Retention for search history and housekeeping tables.
+
+Each policy deletes rows older than its TTL in small batches. Candidates are
+read without holding the write lock, then deleted in one short transaction per
+batch, so live requests are never blocked for long. Deleted rows can be archived
+to gzip-compressed JSONL first, and freed pages are handed back to the
+filesystem with an incremental vacuum.
+
+Usage:
+    python retention.py        # run every policy once
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import database as db
+
+log = logging.getLogger(__name__)
+
+
+def _ttl_days(name, default):
+    """Read a TTL in days from the environment; 'none' keeps rows forever."""
+    value = os.getenv(name, default).strip().lower()
+    return None if value in ('', 'none', 'off') else float(value)
+
+
+# TTL in days per policy (see .env.example)
+TTL_DAYS = {
+    'anonymous_searches': _ttl_days('RETENTION_ANONYMOUS_SEARCHES_DAYS', '30'),
+    'user_searches': _ttl_days('RETENTION_USER_SEARCHES_DAYS', 'none'),
+    'orphan_postings': _ttl_days('RETENTION_ORPHAN_POSTINGS_DAYS', '90'),
+    'contact_submissions': _ttl_days('RETENTION_CONTACT_DAYS', '365'),
+    'password_reset_tokens': _ttl_days('RETENTION_RESET_TOKENS_DAYS', '1'),
+}
+BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '500'))
+PAUSE = int(os.getenv('RETENTION_PAUSE_MS', '50')) / 1000
+INTERVAL = float(os.getenv('RETENTION_INTERVAL_HOURS', '6')) * 3600
+ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR') or None
+VACUUM_PAGES = int(os.getenv('RETENTION_VACUUM_PAGES', '2000'))
+
+
+def _placeholders(ids):
+    return ", ".join("?" * len(ids))
+
+
+# ============= POLICIES =============
+# select(conn, after_id, cutoff, limit) -> rows to delete, in id order
+# delete(conn, ids, cutoff) -> runs inside a write transaction, re-checking the cutoff;
+#   returns (ids still eligible, rows deleted) so only those are archived and counted
+
+def _select_searches(anonymous):
+    user_filter = "user_id IS NULL" if anonymous else "user_id IS NOT NULL"
+
+    def select(conn, after_id, cutoff, limit):
+        searches = [dict(r) for r in conn.execute(
+            f"""SELECT * FROM searches
+                WHERE {user_filter} AND created_at < ? AND id > ?
+                ORDER BY id LIMIT ?""",
+            (cutoff, after_id, limit)
+        )]
+        if searches:
+            # Archive each search with its ranked results
+            ids = [s['id'] for s in searches]
+            results = {}
+            for r in conn.execute(
+                f"""SELECT search_id, id, posting_id, match_score, rank FROM search_results
+                    WHERE search_id IN ({_placeholders(ids)})""",
+                ids
+            ):
+                results.setdefault(r['search_id'], []).append(dict(r))
+            for s in searches:
+                s['results'] = results.get(s['id'], [])
+        return searches
+
+    return select
+
+
+def _delete_searches(conn, ids, cutoff):
+    ids = [r[0] for r in conn.execute(
+        f"SELECT id FROM searches WHERE id IN ({_placeholders(ids)}) AND created_at < ?", (*ids, cutoff)
+    )]
+    if not ids:
+        return [], 0
+    # Bookmarked results outlive their search; saved_jobs only needs the result row
+    conn.execute(
+        f"""DELETE FROM search_results
+            WHERE search_id IN ({_placeholders(ids)})
+              AND NOT EXISTS (SELECT 1 FROM saved_jobs sj WHERE sj.job_result_id = search_results.id)""",
+        ids
+    )
+    return ids, conn.execute(f"DELETE FROM searches WHERE id IN ({_placeholders(ids)})", ids).rowcount
+
+
+def _select_orphan_postings(conn, after_id, cutoff, limit):
+    # JobRow decodes the compact skills/description columns for the archive
+    return [dict(db.JobRow(r)) for r in conn.execute(
+        """SELECT * FROM postings p
+           WHERE p.id > ? AND p.created_at < ?
+             AND NOT EXISTS (SELECT 1 FROM search_results sr WHERE sr.posting_id = p.id)
+           ORDER BY p.id LIMIT ?""",
+        (after_id, cutoff, limit)
+    )]
+
+
+def _delete_orphan_postings(conn, ids, cutoff):
+    # A search may have ranked the posting since it was selected
+    ids = [r[0] for r in conn.execute(
+        f"""SELECT id FROM postings p
+            WHERE id IN ({_placeholders(ids)})
+              AND NOT EXISTS (SELECT 1 FROM search_results sr WHERE sr.posting_id = p.id)""",
+        ids
+    )]
+    if not ids:
+        return [], 0
+    return ids, conn.execute(
+        f"""DELETE FROM postings
+            WHERE id IN ({_placeholders(ids)})
+              AND NOT EXISTS (SELECT 1 FROM search_results sr WHERE sr.posting_id = postings.id)""",
+        ids
+    ).rowcount
+
+
+def _select_older_than(table, column):
+    def select(conn, after_id, cutoff, limit):
+        return [dict(r) for r in conn.execute(
+            f"SELECT * FROM {table} WHERE {column} < ? AND id > ? ORDER BY id LIMIT ?",
+            (cutoff, after_id, limit)
+        )]
+    return select
+
+
+def _delete_older_than(table, column):
+    def delete(conn, ids, cutoff):
+        ids = [r[0] for r in conn.execute(
+            f"SELECT id FROM {table} WHERE id IN ({_placeholders(ids)}) AND {column} < ?", (*ids, cutoff)
+        )]
+        if not ids:
+            return [], 0
+        return ids, conn.execute(
+            f"DELETE FROM {table} WHERE id IN ({_placeholders(ids)}) AND {column} < ?", (*ids, cutoff)
+        ).rowcount
+    return delete
+
+
+# CURRENT_TIMESTAMP columns are UTC; expires_at is written with local datetime.now()
+POLICIES = {
+    'anonymous_searches': (_select_searches(anonymous=True), _delete_searches, 'utc'),
+    'user_searches': (_select_searches(anonymous=False), _delete_searches, 'utc'),
+    'orphan_postings': (_select_orphan_postings, _delete_orphan_postings, 'utc'),
+    'contact_submissions': (
+        _select_older_than('contact_submissions', 'submitted_at'),
+        _delete_older_than('contact_submissions', 'submitted_at'), 'utc'),
+    'password_reset_tokens': (
+        _select_older_than('password_reset_tokens', 'expires_at'),
+        _delete_older_than('password_reset_tokens', 'expires_at'), 'local'),
+}
+
+
+# ============= RUNNER =============
+
+def _cutoff(clock, ttl_days):
+    now = datetime.now(timezone.utc) if clock == 'utc' else datetime.now()
+    cutoff = now - timedelta(days=ttl_days)
+    # Match how each column is stored: CURRENT_TIMESTAMP text vs sqlite3's datetime adapter
+    return cutoff.strftime('%Y-%m-%d %H:%M:%S') if clock == 'utc' else cutoff.isoformat(' ')
+
+
+def _archive(archive_dir, policy, rows):
+    """Append rows to <archive_dir>/<policy>-<YYYYMMDD>.jsonl.gz."""
+    path = Path(archive_dir) / f"{policy}-{datetime.now(timezone.utc):%Y%m%d}.jsonl.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, 'at', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
+
+
+def prune(policy, ttl_days, batch_size=BATCH_SIZE, pause=PAUSE, archive_dir=ARCHIVE_DIR):
+    """
+    Delete rows matched by ``policy`` that are older than ``ttl_days``.
+
+    Returns:
+        int: rows deleted (bookmarked search results are kept)
+    """
+    select, delete, clock = POLICIES[policy]
+    cutoff = _cutoff(clock, ttl_days)
+    deleted, after_id = 0, 0
+
+    conn = db.get_db_connection()
+    try:
+        while True:
+            rows = select(conn, after_id, cutoff, batch_size)
+            if not rows:
+                break
+
+            ids = [r['id'] for r in rows]
+            db.begin_write(conn)
+            try:
+                confirmed, count = delete(conn, ids, cutoff)
+                # Archive before commit: a crash can duplicate archived rows, never lose them
+                if archive_dir and confirmed:
+                    confirmed = set(confirmed)
+                    _archive(archive_dir, policy, [r for r in rows if r['id'] in confirmed])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            deleted += count
+            after_id = ids[-1]
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause)
+    finally:
+        conn.close()
+
+    return deleted
+
+
+def run_retention(ttl_days=None, **kwargs):
+    """
+    Run every policy that has a TTL, then release freed pages.
+
+    Returns:
+        dict: rows deleted per policy
+    """
+    ttl_days = {**TTL_DAYS, **(ttl_days or {})}
+    report = {}
+    for policy in POLICIES:
+        if ttl_days.get(policy) is not None:
+            report[policy] = prune(policy, ttl_days[policy], **kwargs)
+
+    if any(report.values()):
+        db.incremental_vacuum(VACUUM_PAGES)
+    return report
+
+
+class RetentionWorker:
+    """Daemon thread that runs run_retention every ``interval`` seconds."""
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='retention', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                report = run_retention()
+                if any(report.values()):
+                    log.info("✓ Retention pruned %s", report, extra={'deleted': report})
+            except Exception:
+                log.exception("✗ Retention run failed")
+
+
+if __name__ == "__main__":
+    import logs
+    logs.configure()
+    
+    for policy, count in run_retention().items():
+        print(f"  {policy:<24} {count:>8} rows deleted")
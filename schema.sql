@@ -35,20 +35,36 @@ CREATE TABLE IF NOT EXISTS searches (
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
 
--- Job Results
-CREATE TABLE IF NOT EXISTS job_results (
+-- Skills dictionary (postings.skills stores these ids)
+CREATE TABLE IF NOT EXISTS skills (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+
+-- Job Postings (one row per distinct posting, shared across searches)
+CREATE TABLE IF NOT EXISTS postings (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    search_id INTEGER,
+    content_hash TEXT UNIQUE NOT NULL, -- SHA-1 of canonical URL, or of title/company/location/description
     job_title TEXT NOT NULL,
     company TEXT,
     location TEXT,
-    description TEXT,
-    skills TEXT, -- JSON array as string
-    match_score REAL,
+    description BLOB, -- tagged UTF-8 / deflate (see database.encode_description)
+    skills BLOB, -- little-endian uint32 ids into skills
     platform TEXT,
     url TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Search Results (ranked postings returned for a search; id is the public job_result_id)
+CREATE TABLE IF NOT EXISTS search_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    search_id INTEGER NOT NULL,
+    posting_id INTEGER NOT NULL,
+    match_score REAL,
+    rank INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (search_id) REFERENCES searches(id)
+    FOREIGN KEY (search_id) REFERENCES searches(id),
+    FOREIGN KEY (posting_id) REFERENCES postings(id)
 );
 
 -- Saved Jobs (User Bookmarks)
@@ -59,7 +75,7 @@ CREATE TABLE IF NOT EXISTS saved_jobs (
     notes TEXT,
     saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id),
-    FOREIGN KEY (job_result_id) REFERENCES job_results(id),
+    FOREIGN KEY (job_result_id) REFERENCES search_results(id),
     UNIQUE(user_id, job_result_id)
 );
 
@@ -75,7 +91,5 @@ CREATE TABLE IF NOT EXISTS password_reset_tokens (
 );
 
 -- Create indexes for better performance
+-- (composite indexes for the hot query paths are added by migrations in database.py)
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-CREATE INDEX IF NOT EXISTS idx_searches_user ON searches(user_id);
-CREATE INDEX IF NOT EXISTS idx_job_results_search ON job_results(search_id);
-CREATE INDEX IF NOT EXISTS idx_saved_jobs_user ON saved_jobs(user_id);
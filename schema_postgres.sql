@@ -0,0 +1,101 @@
+-- Neuronix AI JobFlow Database Schema
+-- PostgreSQL (DATABASE_URL=postgresql://...); mirrors schema.sql after every
+-- migration in database.py. Timestamps are UTC with second precision, like
+-- SQLite's CURRENT_TIMESTAMP, so keyset cursors compare the same way.
+-- Foreign keys are left undeclared, as SQLite leaves them unenforced: retention
+-- keeps bookmarked search_results after deleting their search.
+
+-- Users Table
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    full_name TEXT,
+    profile_photo TEXT,
+    created_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    last_login TIMESTAMP,
+    is_active INTEGER DEFAULT 1
+);
+
+-- Contact Form Submissions
+CREATE TABLE IF NOT EXISTS contact_submissions (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    subject TEXT,
+    message TEXT NOT NULL,
+    submitted_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    status TEXT DEFAULT 'new' -- new, read, responded
+);
+
+-- Search History
+CREATE TABLE IF NOT EXISTS searches (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id INTEGER,
+    search_type TEXT NOT NULL, -- 'form', 'chat', 'cv'
+    query_data TEXT, -- JSON string of search parameters
+    keywords TEXT,
+    created_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
+);
+
+-- Skills dictionary (postings.skills stores these ids)
+CREATE TABLE IF NOT EXISTS skills (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+
+-- Job Postings (one row per distinct posting, shared across searches)
+CREATE TABLE IF NOT EXISTS postings (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    content_hash TEXT UNIQUE NOT NULL, -- SHA-1 of canonical URL, or of title/company/location/description
+    job_title TEXT NOT NULL,
+    company TEXT,
+    location TEXT,
+    description BYTEA, -- tagged UTF-8 / deflate (see database.encode_description)
+    skills BYTEA, -- little-endian uint32 ids into skills
+    platform TEXT,
+    url TEXT,
+    created_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    search_vector TSVECTOR -- filled by storage.PostgresBackend.index_postings
+);
+
+-- Search Results (ranked postings returned for a search; id is the public job_result_id)
+CREATE TABLE IF NOT EXISTS search_results (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    search_id INTEGER NOT NULL,
+    posting_id INTEGER NOT NULL,
+    match_score DOUBLE PRECISION,
+    rank INTEGER,
+    created_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
+);
+
+-- Saved Jobs (User Bookmarks)
+CREATE TABLE IF NOT EXISTS saved_jobs (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    job_result_id INTEGER NOT NULL,
+    notes TEXT,
+    saved_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+    UNIQUE(user_id, job_result_id)
+);
+
+-- Password Reset Tokens
+CREATE TABLE IF NOT EXISTS password_reset_tokens (
+    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    token TEXT UNIQUE NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    used INTEGER DEFAULT 0,
+    created_at TIMESTAMP(0) DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
+);
+
+-- Indexes (same as the SQLite migrations: composite_indexes, retention_indexes)
+CREATE INDEX IF NOT EXISTS idx_searches_user_created ON searches(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_search_results_search_score
+    ON search_results(search_id, match_score, id, posting_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_saved_jobs_user_saved ON saved_jobs(user_id, saved_at, id, job_result_id, notes);
+CREATE INDEX IF NOT EXISTS idx_search_results_posting ON search_results(posting_id);
+CREATE INDEX IF NOT EXISTS idx_saved_jobs_job_result ON saved_jobs(job_result_id);
+CREATE INDEX IF NOT EXISTS idx_reset_tokens_expires ON password_reset_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_contact_submitted ON contact_submissions(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_postings_search ON postings USING GIN (search_vector);
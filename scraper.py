@@ -1,9 +1,16 @@
 import requests
 from bs4 import BeautifulSoup
+import logging
 import time
 import random
 from urllib.parse import quote_plus, urljoin
 import re
+import os
+
+import database as db
+import tracing
+
+log = logging.getLogger(__name__)
 
 class JobScraper:
     """
@@ -16,7 +23,10 @@ class JobScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.timeout = 10
+        self.local_search = os.getenv('LOCAL_SEARCH_ENABLED', 'True').lower() == 'true'
+        self.local_max_age_days = float(os.getenv('LOCAL_SEARCH_MAX_AGE_DAYS', '7'))
         
+    @tracing.traced('scrape.remoteok')
     def scrape_remoteok(self, keywords, limit=10):
         """Scrape RemoteOK - a popular remote job board with public API"""
         jobs = []
@@ -52,12 +62,13 @@ class JobScraper:
                             'salary': f"${job.get('salary_min', 'N/A')}-${job.get('salary_max', 'N/A')}" if job.get('salary_min') else 'Not specified'
                         })
                         
-            print(f"RemoteOK: Found {len(jobs)} jobs")
+            log.debug("RemoteOK: Found %d jobs", len(jobs), extra={'board': 'RemoteOK', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"Error scraping RemoteOK: {str(e)}")
+            log.warning("Error scraping RemoteOK: %s", e, extra={'board': 'RemoteOK'})
             
         return jobs
     
+    @tracing.traced('scrape.remotive')
     def scrape_remotive(self, keywords, limit=10):
         """Scrape Remotive.io - Remote jobs platform with public API"""
         jobs = []
@@ -91,12 +102,13 @@ class JobScraper:
                             'salary': job.get('salary', 'Not specified')
                         })
                         
-            print(f"Remotive: Found {len(jobs)} jobs")
+            log.debug("Remotive: Found %d jobs", len(jobs), extra={'board': 'Remotive', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"Error scraping Remotive: {str(e)}")
+            log.warning("Error scraping Remotive: %s", e, extra={'board': 'Remotive'})
             
         return jobs
     
+    @tracing.traced('scrape.arbeitnow')
     def scrape_arbeitnow(self, keywords, limit=10):
         """Scrape Arbeitnow - Free job board API"""
         jobs = []
@@ -130,12 +142,13 @@ class JobScraper:
                             'salary': 'Not specified'
                         })
                         
-            print(f"Arbeitnow: Found {len(jobs)} jobs")
+            log.debug("Arbeitnow: Found %d jobs", len(jobs), extra={'board': 'Arbeitnow', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"Error scraping Arbeitnow: {str(e)}")
+            log.warning("Error scraping Arbeitnow: %s", e, extra={'board': 'Arbeitnow'})
             
         return jobs
     
+    @tracing.traced('scrape.findwork')
     def scrape_findwork(self, keywords, limit=10):
         """Scrape Findwork.dev - Developer jobs"""
         jobs = []
@@ -171,12 +184,17 @@ class JobScraper:
                     except Exception as e:
                         continue
                         
-            print(f"Findwork: Found {len(jobs)} jobs")
+            log.debug("Findwork: Found %d jobs", len(jobs), extra={'board': 'Findwork', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"Error scraping Findwork: {str(e)}")
+            log.warning("Error scraping Findwork: %s", e, extra={'board': 'Findwork'})
             
         return jobs
     
+    @tracing.traced('scrape.local')
+    def search_local(self, query, location='', limit=10):
+        """Search postings already stored in jobs.db (FTS5, BM25-ranked) - no network"""
+        return db.search_local(query, location, limit, self.local_max_age_days)
+    
     def get_mock_jobs(self, keywords, limit=10):
         """Fallback mock jobs if scraping fails"""
         mock_jobs = [
@@ -294,9 +312,7 @@ def scrape_jobs(query, location='', max_jobs=20):
     Returns:
         List of job dictionaries
     """
-    print(f"\n{'='*60}")
-    print(f"Starting job search for: '{query}' in '{location or 'Any location'}'")
-    print(f"{'='*60}\n")
+    log.debug("Starting job search for: '%s' in '%s'", query, location or 'Any location')
     
     # Extract keywords from query
     keywords = [word.strip() for word in query.split() if len(word.strip()) > 2]
@@ -306,34 +322,36 @@ def scrape_jobs(query, location='', max_jobs=20):
     scraper = JobScraper()
     all_jobs = []
     
+    # Stored postings first; the boards are only scraped for whatever they don't cover
+    if scraper.local_search:
+        all_jobs.extend(scraper.search_local(query, location, limit=max_jobs))
+    
     # Scrape from multiple platforms
     jobs_per_platform = max(5, max_jobs // 4)  # Distribute across platforms
     
     # Try real platforms first
-    try:
-        print("Searching RemoteOK...")
-        all_jobs.extend(scraper.scrape_remoteok(keywords, limit=jobs_per_platform))
-        time.sleep(1)  # Be respectful to servers
-    except Exception as e:
-        print(f"RemoteOK failed: {e}")
-    
-    try:
-        print("Searching Remotive...")
-        all_jobs.extend(scraper.scrape_remotive(keywords, limit=jobs_per_platform))
-        time.sleep(1)
-    except Exception as e:
-        print(f"Remotive failed: {e}")
-    
-    try:
-        print("Searching Arbeitnow...")
-        all_jobs.extend(scraper.scrape_arbeitnow(keywords, limit=jobs_per_platform))
-        time.sleep(1)
-    except Exception as e:
-        print(f"Arbeitnow failed: {e}")
+    if len(all_jobs) < max_jobs:
+        try:
+            all_jobs.extend(scraper.scrape_remoteok(keywords, limit=jobs_per_platform))
+            time.sleep(1)  # Be respectful to servers
+        except Exception as e:
+            log.warning("RemoteOK failed: %s", e, extra={'board': 'RemoteOK'})
+        
+        try:
+            all_jobs.extend(scraper.scrape_remotive(keywords, limit=jobs_per_platform))
+            time.sleep(1)
+        except Exception as e:
+            log.warning("Remotive failed: %s", e, extra={'board': 'Remotive'})
+        
+        try:
+            all_jobs.extend(scraper.scrape_arbeitnow(keywords, limit=jobs_per_platform))
+            time.sleep(1)
+        except Exception as e:
+            log.warning("Arbeitnow failed: %s", e, extra={'board': 'Arbeitnow'})
     
     # If we don't have enough jobs, add mock data
     if len(all_jobs) < 5:
-        print("\nAdding supplementary mock data...")
+        log.info("Adding supplementary mock data...")
         mock_jobs = scraper.get_mock_jobs(keywords, limit=max_jobs - len(all_jobs))
         all_jobs.extend(mock_jobs)
     
@@ -341,7 +359,7 @@ def scrape_jobs(query, location='', max_jobs=20):
     seen = set()
     unique_jobs = []
     for job in all_jobs:
-        key = (job['title'].lower(), job['company'].lower())
+        key = ((job.get('title') or '').lower(), (job.get('company') or '').lower())
         if key not in seen:
             seen.add(key)
             unique_jobs.append(job)
@@ -349,14 +367,29 @@ def scrape_jobs(query, location='', max_jobs=20):
     # Limit to max_jobs
     result = unique_jobs[:max_jobs]
     
-    print(f"\n{'='*60}")
-    print(f"Search complete! Found {len(result)} unique jobs")
-    print(f"{'='*60}\n")
+    log.info("Search complete! Found %d unique jobs for '%s'", len(result), query, extra={'jobs': len(result)})
     
     return result
 
 
+
+def scrape_jobs_stream(query, location='', max_jobs=20):
+    """
+    Same interface as scraper_enhanced.scrape_jobs_stream. This scraper asks the
+    boards in turn, so everything arrives as one batch.
+    
+    Yields:
+        (platform_name, jobs)
+    """
+    jobs = scrape_jobs(query, location, max_jobs)
+    for i, job in enumerate(jobs, 1):
+        job['id'] = i
+    yield 'All platforms', jobs
+
 if __name__ == "__main__":
+    import logs
+    logs.configure(default_level='DEBUG')
+    
     # Test the scraper
     test_jobs = scrape_jobs("Python Developer", "Remote", max_jobs=10)
     
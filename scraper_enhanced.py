@@ -1,14 +1,21 @@
 import requests
 from bs4 import BeautifulSoup
-import time
 import random
 from urllib.parse import quote_plus, urljoin
+import logging
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# Before the project imports: database reads its DB_* settings when imported
 load_dotenv()
 
+import database as db
+import tracing
+
+log = logging.getLogger(__name__)
+
 class EnhancedJobScraper:
     """
     Enhanced multi-platform job scraper with more sources and better error handling.
@@ -25,7 +32,10 @@ class EnhancedJobScraper:
         self.timeout = 15
         self.adzuna_app_id = os.getenv('ADZUNA_APP_ID', '')
         self.adzuna_app_key = os.getenv('ADZUNA_APP_KEY', '')
+        self.local_search = os.getenv('LOCAL_SEARCH_ENABLED', 'True').lower() == 'true'
+        self.local_max_age_days = float(os.getenv('LOCAL_SEARCH_MAX_AGE_DAYS', '7'))
         
+    @tracing.traced('scrape.remoteok')
     def scrape_remoteok(self, keywords, limit=10):
         """Scrape RemoteOK - Popular remote job board with public API"""
         jobs = []
@@ -59,12 +69,13 @@ class EnhancedJobScraper:
                             'job_type': 'Remote'
                         })
                         
-            print(f"✓ RemoteOK: Found {len(jobs)} jobs")
+            log.debug("✓ RemoteOK: Found %d jobs", len(jobs), extra={'board': 'RemoteOK', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ RemoteOK error: {str(e)}")
+            log.warning("✗ RemoteOK error: %s", e, extra={'board': 'RemoteOK'})
             
         return jobs
     
+    @tracing.traced('scrape.remotive')
     def scrape_remotive(self, keywords, limit=10):
         """Scrape Remotive.io - Remote jobs platform with public API"""
         jobs = []
@@ -98,12 +109,13 @@ class EnhancedJobScraper:
                             'job_type': job.get('job_type', 'Full-time')
                         })
                         
-            print(f"✓ Remotive: Found {len(jobs)} jobs")
+            log.debug("✓ Remotive: Found %d jobs", len(jobs), extra={'board': 'Remotive', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ Remotive error: {str(e)}")
+            log.warning("✗ Remotive error: %s", e, extra={'board': 'Remotive'})
             
         return jobs
     
+    @tracing.traced('scrape.arbeitnow')
     def scrape_arbeitnow(self, keywords, limit=10):
         """Scrape Arbeitnow - Free job board API for Europe"""
         jobs = []
@@ -137,18 +149,19 @@ class EnhancedJobScraper:
                             'job_type': job.get('job_types', ['Full-time'])[0] if job.get('job_types') else 'Full-time'
                         })
                         
-            print(f"✓ Arbeitnow: Found {len(jobs)} jobs")
+            log.debug("✓ Arbeitnow: Found %d jobs", len(jobs), extra={'board': 'Arbeitnow', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ Arbeitnow error: {str(e)}")
+            log.warning("✗ Arbeitnow error: %s", e, extra={'board': 'Arbeitnow'})
             
         return jobs
     
+    @tracing.traced('scrape.adzuna')
     def scrape_adzuna(self, keywords, limit=10, location='us'):
         """Scrape Adzuna - Job search API (requires API key)"""
         jobs = []
         
         if not self.adzuna_app_id or not self.adzuna_app_key:
-            print("⚠ Adzuna: API credentials not configured (optional)")
+            log.debug("⚠ Adzuna: API credentials not configured (optional)")
             return jobs
             
         try:
@@ -182,12 +195,13 @@ class EnhancedJobScraper:
                         'job_type': job.get('contract_time', 'Full-time')
                     })
                         
-            print(f"✓ Adzuna: Found {len(jobs)} jobs")
+            log.debug("✓ Adzuna: Found %d jobs", len(jobs), extra={'board': 'Adzuna', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ Adzuna error: {str(e)}")
+            log.warning("✗ Adzuna error: %s", e, extra={'board': 'Adzuna'})
             
         return jobs
     
+    @tracing.traced('scrape.weworkremotely')
     def scrape_weworkremotely(self, keywords, limit=10):
         """Scrape WeWorkRemotely - Popular remote job board"""
         jobs = []
@@ -227,12 +241,13 @@ class EnhancedJobScraper:
                     except Exception:
                         continue
                         
-            print(f"✓ WeWorkRemotely: Found {len(jobs)} jobs")
+            log.debug("✓ WeWorkRemotely: Found %d jobs", len(jobs), extra={'board': 'WeWorkRemotely', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ WeWorkRemotely error: {str(e)}")
+            log.warning("✗ WeWorkRemotely error: %s", e, extra={'board': 'WeWorkRemotely'})
             
         return jobs
     
+    @tracing.traced('scrape.findwork')
     def scrape_findwork(self, keywords, limit=10):
         """Scrape Findwork.dev - Developer jobs"""
         jobs = []
@@ -268,12 +283,13 @@ class EnhancedJobScraper:
                     except Exception:
                         continue
                         
-            print(f"✓ Findwork: Found {len(jobs)} jobs")
+            log.debug("✓ Findwork: Found %d jobs", len(jobs), extra={'board': 'Findwork', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ Findwork error: {str(e)}")
+            log.warning("✗ Findwork error: %s", e, extra={'board': 'Findwork'})
             
         return jobs
     
+    @tracing.traced('scrape.himalayas')
     def scrape_himalayas(self, keywords, limit=10):
         """Scrape Himalayas.app - Remote jobs platform"""
         jobs = []
@@ -309,12 +325,17 @@ class EnhancedJobScraper:
                     except Exception:
                         continue
                         
-            print(f"✓ Himalayas: Found {len(jobs)} jobs")
+            log.debug("✓ Himalayas: Found %d jobs", len(jobs), extra={'board': 'Himalayas', 'jobs': len(jobs)})
         except Exception as e:
-            print(f"✗ Himalayas error: {str(e)}")
+            log.warning("✗ Himalayas error: %s", e, extra={'board': 'Himalayas'})
             
         return jobs
     
+    @tracing.traced('scrape.local')
+    def search_local(self, query, location='', limit=10):
+        """Search postings already stored in jobs.db (FTS5, BM25-ranked) - no network"""
+        return db.search_local(query, location, limit, self.local_max_age_days)
+    
     def get_mock_jobs(self, keywords, limit=10):
         """Enhanced fallback mock jobs"""
         mock_jobs = [
@@ -452,25 +473,25 @@ class EnhancedJobScraper:
         return filtered[:limit] if filtered else mock_jobs[:limit]
 
 
-def scrape_jobs(query, location='', max_jobs=20):
+def scrape_jobs_stream(query, location='', max_jobs=20):
     """
-    Enhanced main function to scrape jobs from multiple platforms.
+    Search every platform at once and yield jobs as each one answers.
+    
+    Stored postings come first; the boards are then queried concurrently and
+    each batch is yielded as soon as its board responds, so the fastest board
+    sets the time to first results. Boards still running once max_jobs is
+    reached are abandoned.
     
     Args:
         query: Search query or job title
         location: Location filter (optional)
-        max_jobs: Maximum number of jobs to return
+        max_jobs: Maximum number of jobs to yield in total
         
-    Returns:
-        List of job dictionaries with enhanced metadata
+    Yields:
+        (platform_name, jobs) - new, de-duplicated jobs numbered by 'id' across batches
     """
-    print(f"\n{'='*70}")
-    print(f"🔍 Starting Enhanced Job Search")
-    print(f"{'='*70}")
-    print(f"Query: '{query}'")
-    print(f"Location: '{location or 'Any location'}'")
-    print(f"Target: {max_jobs} jobs")
-    print(f"{'='*70}\n")
+    log.debug("🔍 Starting job search for '%s' in '%s' (target %d jobs)",
+              query, location or 'Any location', max_jobs)
     
     # Extract keywords from query
     keywords = [word.strip() for word in query.split() if len(word.strip()) > 2]
@@ -478,12 +499,31 @@ def scrape_jobs(query, location='', max_jobs=20):
         keywords = ['developer']
     
     scraper = EnhancedJobScraper()
-    all_jobs = []
+    seen = set()
+    found = []
+    
+    def new_jobs(jobs):
+        """Drop duplicates of jobs already yielded, number the rest, stop at max_jobs."""
+        batch = []
+        for job in jobs:
+            # Stored postings may have no company
+            key = ((job.get('title') or '').lower().strip(), (job.get('company') or '').lower().strip())
+            if key not in seen and len(found) + len(batch) < max_jobs:
+                seen.add(key)
+                job['id'] = len(found) + len(batch) + 1
+                batch.append(job)
+        found.extend(batch)
+        return batch
+    
+    # Stored postings first; the boards are only scraped for whatever they don't cover
+    if scraper.local_search:
+        batch = new_jobs(scraper.search_local(query, location, limit=max_jobs))
+        if batch:
+            yield 'Local', batch
     
     # Calculate jobs per platform
     jobs_per_platform = max(3, max_jobs // 6)
     
-    # Scrape from all platforms with error handling
     platforms = [
         ('RemoteOK', lambda: scraper.scrape_remoteok(keywords, limit=jobs_per_platform)),
         ('Remotive', lambda: scraper.scrape_remotive(keywords, limit=jobs_per_platform)),
@@ -494,47 +534,58 @@ def scrape_jobs(query, location='', max_jobs=20):
         ('Adzuna', lambda: scraper.scrape_adzuna(keywords, limit=jobs_per_platform)),
     ]
     
-    for platform_name, scrape_func in platforms:
+    # Each board is a different server, so they can all be asked at once
+    if len(found) < max_jobs:
+        pool = ThreadPoolExecutor(max_workers=len(platforms), thread_name_prefix='scrape')
+        # Each board's span joins the request's trace, though it runs on a pool thread
+        futures = {pool.submit(tracing.in_current_trace(scrape_func)): platform_name
+                   for platform_name, scrape_func in platforms}
         try:
-            jobs = scrape_func()
-            all_jobs.extend(jobs)
-            time.sleep(0.5)  # Be respectful to servers
-        except Exception as e:
-            print(f"✗ {platform_name} failed: {e}")
+            for future in as_completed(futures):
+                platform_name = futures[future]
+                try:
+                    batch = new_jobs(future.result())
+                except Exception as e:
+                    log.warning("✗ %s failed: %s", platform_name, e, extra={'board': platform_name})
+                    continue
+                if batch:
+                    yield platform_name, batch
+                if len(found) >= max_jobs:
+                    break
+        finally:
+            # Don't wait for slow boards once we're done (or the client has gone)
+            pool.shutdown(wait=False, cancel_futures=True)
     
     # Add mock data if needed
-    if len(all_jobs) < 5:
-        print(f"\n⚠ Adding supplementary mock data (found only {len(all_jobs)} real jobs)...")
-        mock_jobs = scraper.get_mock_jobs(keywords, limit=max_jobs - len(all_jobs))
-        all_jobs.extend(mock_jobs)
-    
-    # Remove duplicates
-    seen = set()
-    unique_jobs = []
-    for job in all_jobs:
-        key = (job['title'].lower().strip(), job['company'].lower().strip())
-        if key not in seen:
-            seen.add(key)
-            unique_jobs.append(job)
-    
-    # Limit to max_jobs
-    result = unique_jobs[:max_jobs]
+    if len(found) < 5:
+        log.info("⚠ Adding supplementary mock data (found only %d real jobs)", len(found))
+        batch = new_jobs(scraper.get_mock_jobs(keywords, limit=max_jobs - len(found)))
+        if batch:
+            yield 'Mock Data', batch
     
-    # Add unique IDs
-    for i, job in enumerate(result, 1):
-        job['id'] = i
-    
-    print(f"\n{'='*70}")
-    print(f"✅ Search Complete!")
-    print(f"{'='*70}")
-    print(f"Total Jobs Found: {len(result)}")
-    print(f"Platforms Used: {len([p for p, _ in platforms])}")
-    print(f"{'='*70}\n")
+    log.info("✓ Search for '%s' complete: %d jobs from %d platforms", query, len(found), len(platforms),
+             extra={'jobs': len(found)})
+
+
+def scrape_jobs(query, location='', max_jobs=20):
+    """
+    Enhanced main function to scrape jobs from multiple platforms.
     
-    return result
+    Args:
+        query: Search query or job title
+        location: Location filter (optional)
+        max_jobs: Maximum number of jobs to return
+        
+    Returns:
+        List of job dictionaries with enhanced metadata
+    """
+    return [job for _, jobs in scrape_jobs_stream(query, location, max_jobs) for job in jobs]
 
 
 if __name__ == "__main__":
+    import logs
+    logs.configure(default_level='DEBUG')
+    
     # Test the enhanced scraper
     test_jobs = scrape_jobs("Python Developer", "Remote", max_jobs=15)
     
@@ -1,152 +1,687 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file, make_response
+from dotenv import load_dotenv
+
+# First, so .env reaches the settings modules read on import (DATABASE_URL, DB_*, CV_*, LOG_*)
+load_dotenv()
+
+from flask import Flask, Request, request, jsonify, send_from_directory, send_file, url_for, Response, stream_with_context, g
 from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
 import os
 import hashlib
+import tempfile
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from functools import lru_cache, wraps
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
-# Use enhanced versions with fallback to original
-try:
-    from scraper_enhanced import scrape_jobs
-    print("✓ Using enhanced scraper")
-except ImportError:
-    from scraper import scrape_jobs
-    print("⚠ Using original scraper")
-
-try:
-    from matcher_enhanced import match_jobs
-    print("✓ Using enhanced matcher")
-except ImportError:
-    from matcher import match_jobs
-    print("⚠ Using original matcher")
-
+import cv_parser
 from cv_parser import CVParser
 import database as db
 import email_utils
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+import atexit
+from db_writer import SearchWriter
+import retention
+import tasks
+import pdf_export
+import admission
+import http_cache
+import logs
+import sessions
+import tracing
 from datetime import datetime
 
+# Leveled logging through a background writer (see logs.py); LOG_LEVEL=DEBUG for per-board detail
+logs.configure()
+log = logging.getLogger(__name__)
+
+# ============= LAZY IMPORTS =============
+# The scrapers (requests, BeautifulSoup), matchers (scikit-learn) and PDF export
+# (reportlab, see pdf_export.py) load on first use, so workers start fast.
+# WEB_PRELOAD loads them up front instead; `python import_profile.py` shows
+# what each import costs.
+
+@lru_cache(maxsize=None)
+def scraper_module():
+    # Use enhanced versions with fallback to original
+    try:
+        import scraper_enhanced as module
+        log.info("✓ Using enhanced scraper")
+    except ImportError:
+        import scraper as module
+        log.warning("⚠ Using original scraper")
+    return module
+
+@lru_cache(maxsize=None)
+def matcher_module():
+    try:
+        import matcher_enhanced as module
+        log.info("✓ Using enhanced matcher")
+    except ImportError:
+        import matcher as module
+        log.warning("⚠ Using original matcher")
+    return module
+
+def scrape_jobs(query, location='', max_jobs=20):
+    return scraper_module().scrape_jobs(query, location, max_jobs)
+
+def scrape_jobs_stream(query, location='', max_jobs=20):
+    return scraper_module().scrape_jobs_stream(query, location, max_jobs)
+
+def match_jobs(user_profile, jobs):
+    return matcher_module().match_jobs(user_profile, jobs)
+
+# ============= TRACING =============
+# Every request is traced (tracing.py): its duration lands in a per-route
+# histogram, and requests slower than TRACE_SLOW_REQUEST_MS print their spans.
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON encoding, timed as the 'serialize' span."""
+
+    def dumps(self, obj, **kwargs):
+        with tracing.span('serialize'):
+            return super().dumps(obj, **kwargs)
+
+class UploadRequest(Request):
+    """Keeps uploads up to the CV size cap in memory; werkzeug spools anything over 500 KB to disk."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=cv_parser.MAX_CV_BYTES, mode='rb+')
+
 app = Flask(__name__, static_folder='src')
+app.request_class = UploadRequest
+app.json = TracedJSONProvider(app)
 CORS(app)
 
+@app.before_request
+def begin_trace():
+    g.trace = tracing.start_trace(f"{request.method} {request.path}")
+
+# Registered before http_cache, so it runs after compression and times it too
+@app.after_request
+def end_trace(response):
+    root = g.pop('trace', None)
+    if root is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        tracing.finish_trace(root, request.method, route, response.status_code)
+    return response
+
+# Compression, ETags and cache headers (see http_cache.py)
+http_cache.init_app(app)
+
 # Initialize database
 db.init_database()
 
+# Search history is persisted off the request path; flush it on shutdown
+search_writer = SearchWriter()
+
+# Prune expired history in the background (RETENTION_INTERVAL_HOURS=0 disables it)
+retention_worker = retention.RetentionWorker().start() if retention.INTERVAL > 0 else None
+
+# Worker pool for ?async=1 recommendations (see tasks.py)
+task_queue = tasks.TaskQueue()
+TASK_MAX_WAIT = float(os.getenv('RECOMMEND_TASK_MAX_WAIT_SECONDS', '30'))
+TASK_RETRY_AFTER = int(os.getenv('RECOMMEND_RETRY_AFTER_SECONDS', '5'))
+# How long shutdown() lets running recommendation tasks finish
+SHUTDOWN_TIMEOUT = float(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+
+def _preload_cv():
+    import PyPDF2, docx
+
+def _preload_pdf():
+    pdf_export._styles()
+
+# What warm_up() can load before a worker takes traffic (WEB_PRELOAD, comma-separated, or 'all')
+PRELOADERS = {
+    'db': lambda: db.search_postings('warm up', limit=1),  # Connections and the skills dictionary
+    'scraper': scraper_module,
+    'matcher': lambda: match_jobs(
+        {'skills': ['Python'], 'job_title': 'Developer'},
+        [{'title': 'Python Developer', 'company': '', 'description': 'Python developer', 'skills': ['Python']}]
+    ),
+    'cv': _preload_cv,
+    'pdf': _preload_pdf,
+}
+WEB_PRELOAD = [name.strip() for name in os.getenv('WEB_PRELOAD', 'db').split(',') if name.strip()]
+
+def warm_up(preload=None):
+    """Load the WEB_PRELOAD paths now instead of on their first request."""
+    names = preload if preload is not None else WEB_PRELOAD
+    if 'all' in names:
+        names = list(PRELOADERS)
+    for name in names:
+        if name not in PRELOADERS:
+            log.warning("⚠ Unknown preload '%s' (choose from %s)", name, ', '.join(PRELOADERS))
+            continue
+        start = time.perf_counter()
+        PRELOADERS[name]()
+        log.info("✓ Preloaded %s in %.0f ms", name, (time.perf_counter() - start) * 1000)
+
+_shutdown_done = threading.Event()
+
+def shutdown():
+    """Drain background work: let running tasks finish, then write all pending search history."""
+    if _shutdown_done.is_set():
+        return
+    _shutdown_done.set()
+    task_queue.close(timeout=SHUTDOWN_TIMEOUT)
+    if retention_worker:
+        retention_worker.stop()
+    search_writer.close()
+    log.info("✓ Background work drained")
+
+atexit.register(shutdown)
+
 # Serve static files (Frontend)
 @app.route('/')
 def serve_index():
-    return send_from_directory(app.static_folder, 'index.html')
+    return http_cache.static_file(send_from_directory(app.static_folder, 'index.html'), 'index.html')
 
 @app.route('/<path:path>')
 def serve_static(path):
-    return send_from_directory(app.static_folder, path)
+    return http_cache.static_file(send_from_directory(app.static_folder, path), path)
 
-# Helper function
+# Helper functions
 def hash_password(password):
     """Simple password hashing (use bcrypt in production)."""
     return hashlib.sha256(password.encode()).hexdigest()
 
+def attach_job_result_ids(jobs, job_result_ids):
+    """Expose the stored row id so the client can bookmark a job directly."""
+    for job, job_result_id in zip(jobs, job_result_ids):
+        job['job_result_id'] = job_result_id
+    return jobs
+
+def get_page_args(default_limit):
+    """Read ?cursor=&limit= keyset pagination parameters from the query string."""
+    cursor = request.args.get('cursor') or None
+    limit = int(request.args.get('limit', default_limit))
+    return cursor, limit
+
+def wants_page():
+    """List endpoints return everything unless the client asks for a page."""
+    return 'cursor' in request.args or 'limit' in request.args
+
+def get_fields_arg(default=None):
+    """
+    The ?fields=a,b projection: those fields of each job, every field for
+    ?fields=all, and ``default`` when the parameter is absent.
+    """
+    fields = request.args.get('fields', '').strip()
+    if not fields:
+        return default
+    if fields == 'all':
+        return None
+    return [name.strip() for name in fields.split(',') if name.strip()]
+
+def project_jobs(body, fields):
+    """A copy of a response body whose jobs keep only ``fields`` (None keeps everything)."""
+    if fields is None or 'jobs' not in body:
+        return body
+    return {**body, "jobs": [{name: job[name] for name in fields if name in job} for job in body['jobs']]}
+
+# ============= SESSIONS =============
+# Login hands out a signed session token (sessions.py). Endpoints that act for
+# a user take the user from the token, never from a client-sent user_id.
+
+def current_user():
+    """The user whose session token came with this request (cached per request), or None."""
+    if 'user' not in g:
+        g.user = sessions.authenticate(sessions.bearer_token(request.headers.get('Authorization')))
+    return g.user
+
+def session_user_id():
+    user = current_user()
+    return user['id'] if user else None
+
+def login_required(view):
+    """Answer 401 without a valid session token, and 403 if a client-sent user_id names someone else."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user = current_user()
+        if user is None:
+            return jsonify({"status": "error", "message": "Login required", "login_required": True}), 401
+        claimed = (request.args.get('user_id') or request.form.get('user_id')
+                   or (request.get_json(silent=True) or {}).get('user_id'))
+        if claimed is not None and str(claimed) != str(user['id']):
+            return jsonify({"status": "error", "message": "user_id does not match your session"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+def persist_search(user_id, search_type, query_data, keywords, matched_jobs):
+    """Queue a search and its results for write-behind storage; returns the search_id."""
+    search_id, job_result_ids = search_writer.submit(user_id, search_type, query_data, keywords, matched_jobs)
+    attach_job_result_ids(matched_jobs, job_result_ids)
+    return search_id
+
+# ============= ADMISSION CONTROL =============
+# Expensive endpoints are rate limited per client, and pipelines running in a
+# request are capped per process (see admission.py).
+
+def client_key():
+    """Who a rate limit applies to: the session's user, else the client's IP address."""
+    user_id = session_user_id()
+    return f"user:{user_id}" if user_id else f"ip:{request.remote_addr}"
+
+def retry_later(message, retry_after, status=429):
+    """An error response telling the client how many seconds to wait before retrying."""
+    response = jsonify({"status": "error", "message": message})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, status
+
+def rate_limited(policy):
+    """Answer 429 with Retry-After once a client goes over ``policy``'s rate (admission.RATES)."""
+    def decorate(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            wait = admission.check(policy, client_key())
+            if wait:
+                return retry_later("Too many requests, please slow down", wait)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def overloaded():
+    return retry_later("Server is busy, please retry shortly", admission.SHED_RETRY_AFTER, 503)
+
+def release_pipeline_on_close(response):
+    """Hold this request's pipeline slot until a streamed response is finished (or abandoned)."""
+    response.call_on_close(admission.pipelines.release)
+    return response
+
 # ============= JOB RECOMMENDATION ENDPOINTS =============
+# Each endpoint turns its input into a search: what to scrape, the profile to
+# match against, and what to store in the history. recommend() runs it inline
+# or as a task (?async=1 or "Prefer: respond-async"); stream_recommendation()
+# sends results over SSE as each board answers.
+
+def checkpoint(task):
+    """Stop a cancelled task between pipeline stages."""
+    if task is not None:
+        task.checkpoint()
+
+def form_search(data):
+    keywords = ', '.join(data.get('skills', [])) if isinstance(data.get('skills'), list) else data.get('skills', '')
+    return {
+        'query': data.get('job_title', ''), 'location': data.get('location', ''), 'profile': data,
+        'user_id': session_user_id(), 'search_type': 'form', 'query_data': data, 'keywords': keywords
+    }
+
+def chat_search(data):
+    user_message = data.get('message', '')
+    return {
+        'query': user_message, 'location': "", 'profile': {"keywords": user_message},
+        'user_id': session_user_id(), 'search_type': 'chat',
+        'query_data': {'message': user_message}, 'keywords': user_message[:100]
+    }
+
+def cv_search(filename, content, user_id):
+    # Parsed straight from memory; the upload never touches the disk
+    parsed_data = CVParser().parse(content, filename)
+    if "error" in parsed_data:
+        raise ValueError(parsed_data["error"])
+    
+    extracted_skills = parsed_data.get("skills", [])
+    job_title = parsed_data.get("job_title", "Unknown")
+    
+    # Scrape jobs based on extracted job title or skills
+    search_query = job_title if job_title != "Unknown" else "Software Engineer"
+    if not search_query and extracted_skills:
+        search_query = extracted_skills[0]
+    
+    return {
+        'query': search_query, 'location': "",
+        # The matcher expects a dictionary with 'skills'
+        'profile': {"skills": extracted_skills, "job_title": job_title},
+        'user_id': user_id, 'search_type': 'cv',
+        'query_data': {'filename': filename, 'parsed_data': parsed_data},
+        'keywords': ", ".join(extracted_skills) if extracted_skills else "",
+        'extra': {"parsed_data": parsed_data}
+    }
+
+def search_pipeline(task, search):
+    """Scrape, match and persist a search; returns the response body."""
+    jobs = scrape_jobs(search['query'], search['location'])
+    checkpoint(task)
+    matched_jobs = match_jobs(search['profile'], jobs)
+    checkpoint(task)
+    search_id = persist_search(
+        search['user_id'], search['search_type'], search['query_data'], search['keywords'], matched_jobs)
+    return {"status": "success", "jobs": matched_jobs, "search_id": search_id, **search.get('extra', {})}
+
+def cv_pipeline(task, filename, content, user_id):
+    search = cv_search(filename, content, user_id)
+    checkpoint(task)
+    return search_pipeline(task, search)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def stream_recommendation(search):
+    """
+    Server-Sent Events for a search:
+    - jobs: {"source", "jobs": newly matched jobs, "order": ids of every job so far, best first}
+    - done: the same body as the non-streaming endpoint, including search_id
+    - error: {"status": "error", "message"}
+    """
+    ranked = []
+    try:
+        for source, jobs in scrape_jobs_stream(search['query'], search['location']):
+            matched = match_jobs(search['profile'], jobs)
+            # Both runs are already sorted, so this is a linear merge
+            ranked.extend(matched)
+            ranked.sort(key=lambda job: job.get('match_score', 0), reverse=True)
+            yield sse_event('jobs', {"source": source, "jobs": matched, "order": [job['id'] for job in ranked]})
+        
+        search_id = persist_search(
+            search['user_id'], search['search_type'], search['query_data'], search['keywords'], ranked)
+        yield sse_event('done', {"status": "success", "jobs": ranked, "search_id": search_id,
+                                 **search.get('extra', {})})
+    except Exception as e:
+        yield sse_event('error', {"status": "error", "message": str(e)})
+
+def event_stream(search):
+    if not admission.pipelines.try_acquire():
+        return overloaded()
+    return release_pipeline_on_close(Response(
+        stream_with_context(stream_recommendation(search)),
+        mimetype='text/event-stream',
+        # Proxies must pass each event on as it's written
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    ))
+
+def wants_async():
+    """Clients opt in to task mode with ?async=1 or a "Prefer: respond-async" header."""
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
+def run_recommendation(pipeline, *args):
+    """Run a pipeline inline, or queue it and answer 202 with its task_id."""
+    if not wants_async():
+        # Tasks are bounded by the task queue; inline pipelines by the admission cap
+        if not admission.pipelines.try_acquire():
+            return overloaded()
+        try:
+            return jsonify(project_jobs(pipeline(None, *args), get_fields_arg()))
+        finally:
+            admission.pipelines.release()
+    
+    try:
+        task = task_queue.submit(pipeline, *args)
+    except tasks.QueueFull:
+        return retry_later("Too many searches in progress, please retry shortly", TASK_RETRY_AFTER)
+    
+    status_url = url_for('get_recommendation_task', task_id=task.id)
+    return jsonify({"status": "accepted", "task_id": task.id, "status_url": status_url}), 202, {'Location': status_url}
 
 @app.route('/api/recommend/form', methods=['POST'])
+@rate_limited('recommend')
 def recommend_form():
     try:
-        data = request.json
-        jobs = scrape_jobs(data.get('job_title', ''), data.get('location', ''))
-        matched_jobs = match_jobs(data, jobs)
-        
-        user_id = data.get('user_id')
-        keywords = ', '.join(data.get('skills', [])) if isinstance(data.get('skills'), list) else data.get('skills', '')
-        search_id = db.save_search(user_id, 'form', data, keywords)
-        db.save_job_results(search_id, matched_jobs)
-        
-        return jsonify({"status": "success", "jobs": matched_jobs, "search_id": search_id})
+        return run_recommendation(search_pipeline, form_search(request.json))
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/recommend/chat', methods=['POST'])
+@rate_limited('recommend')
 def recommend_chat():
     try:
-        data = request.json
-        user_message = data.get('message', '')
-        
-        jobs = scrape_jobs(user_message, "")
-        matched_jobs = match_jobs({"keywords": user_message}, jobs)
-        
-        user_id = data.get('user_id')
-        search_id = db.save_search(user_id, 'chat', {'message': user_message}, user_message[:100])
-        db.save_job_results(search_id, matched_jobs)
-        
-        return jsonify({"status": "success", "jobs": matched_jobs, "search_id": search_id})
+        return run_recommendation(search_pipeline, chat_search(request.json))
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Room for the multipart framing and form fields around the file itself
+CV_FORM_OVERHEAD = 64 * 1024
+
+def get_cv_upload():
+    """
+    The uploaded CV as (filename, bytes).
+    
+    Raises ValueError if there is none, and cv_parser.CVTooLarge (before the
+    body is read, when the client sends Content-Length) if it's over the cap.
+    """
+    # werkzeug stops reading the body once it passes this
+    request.max_content_length = cv_parser.MAX_CV_BYTES + CV_FORM_OVERHEAD
+    try:
+        files = request.files
+    except RequestEntityTooLarge:
+        raise cv_parser.CVTooLarge()
+    if 'file' not in files:
+        raise ValueError("No file uploaded")
+    file = files['file']
+    if file.filename == '':
+        raise ValueError("No selected file")
+    # Read the upload now: the request (and its stream) is gone by the time a task runs
+    return secure_filename(file.filename), cv_parser.read_upload(file.stream)
+
 @app.route('/api/recommend/cv', methods=['POST'])
+@rate_limited('cv')
 def recommend_cv():
     try:
-        if 'file' not in request.files:
-            return jsonify({"status": "error", "message": "No file uploaded"}), 400
-            
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"status": "error", "message": "No selected file"}), 400
-            
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        temp_path = os.path.join("temp_uploads", filename)
-        os.makedirs("temp_uploads", exist_ok=True)
-        file.save(temp_path)
-        
+        filename, content = get_cv_upload()
+        return run_recommendation(cv_pipeline, filename, content, session_user_id())
+    except cv_parser.CVTooLarge as e:
+        return jsonify({"status": "error", "message": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/recommend/form/stream', methods=['POST'])
+@rate_limited('recommend')
+def recommend_form_stream():
+    return event_stream(form_search(request.json))
+
+@app.route('/api/recommend/chat/stream', methods=['POST'])
+@rate_limited('recommend')
+def recommend_chat_stream():
+    return event_stream(chat_search(request.json))
+
+@app.route('/api/recommend/cv/stream', methods=['POST'])
+@rate_limited('cv')
+def recommend_cv_stream():
+    try:
+        filename, content = get_cv_upload()
+        search = cv_search(filename, content, session_user_id())
+    except cv_parser.CVTooLarge as e:
+        return jsonify({"status": "error", "message": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return event_stream(search)
+
+@app.route('/api/recommend/tasks/<task_id>', methods=['GET'])
+def get_recommendation_task(task_id):
+    """Task status; ?wait=N long-polls up to N seconds (max TASK_MAX_WAIT) for it to finish."""
+    task = task_queue.get(task_id)
+    if task is None:
+        return jsonify({"status": "error", "message": "Task not found or expired"}), 404
+    
+    try:
+        wait = min(float(request.args.get('wait', 0)), TASK_MAX_WAIT)
+    except ValueError:
+        return jsonify({"status": "error", "message": "wait must be a number of seconds"}), 400
+    if wait > 0:
+        task.wait(wait)
+    body = task.to_dict()
+    if 'result' in body:
+        body['result'] = project_jobs(body['result'], get_fields_arg())
+    return jsonify(body)
+
+@app.route('/api/recommend/tasks/<task_id>', methods=['DELETE'])
+def cancel_recommendation_task(task_id):
+    task = task_queue.cancel(task_id)
+    if task is None:
+        return jsonify({"status": "error", "message": "Task not found or expired"}), 404
+    if task.status in (tasks.SUCCEEDED, tasks.FAILED):
+        return jsonify({"status": "error", "message": f"Task already {task.status}", "task": task.to_dict()}), 409
+    # Running tasks stop at their next checkpoint
+    return jsonify(task.to_dict()), 202 if task.status == tasks.RUNNING else 200
+
+# ============= BATCH RECOMMENDATIONS =============
+# A cohort of profiles (or CVs) is matched against one shared job pool: each
+# distinct search query is fetched once, then every profile is scored against
+# the whole pool in matrix passes (matcher_enhanced.match_profiles).
+
+BATCH_MAX_PROFILES = int(os.getenv('BATCH_MAX_PROFILES', '500'))
+# Whole request body, JSON or multipart; werkzeug stops reading past it
+BATCH_MAX_UPLOAD_BYTES = int(float(os.getenv('BATCH_MAX_UPLOAD_MB', '50')) * 1024 * 1024)
+BATCH_MAX_QUERIES = int(os.getenv('BATCH_MAX_QUERIES', '5'))
+# Larger batches are streamed as NDJSON, one line per profile
+BATCH_STREAM_THRESHOLD = int(os.getenv('BATCH_STREAM_THRESHOLD', '50'))
+
+def batch_searches():
+    """
+    One search per profile: JSON {"profiles": [...]} or CV files uploaded as 'files'.
+    
+    Returns:
+        tuple: (searches, failures) - failures are result entries for CVs that couldn't be parsed
+    
+    Raises ValueError past BATCH_MAX_PROFILES (before any profile is parsed), and
+    RequestEntityTooLarge if the body is over BATCH_MAX_UPLOAD_BYTES.
+    """
+    request.max_content_length = BATCH_MAX_UPLOAD_BYTES
+    searches, failures = [], []
+    if request.files:
+        files = request.files.getlist('files')
+        if len(files) > BATCH_MAX_PROFILES:
+            raise ValueError(f"At most {BATCH_MAX_PROFILES} profiles per batch")
+        user_id = session_user_id()
+        for index, file in enumerate(files):
+            filename = secure_filename(file.filename)
+            try:
+                search = cv_search(filename, cv_parser.read_upload(file.stream), user_id)
+            except ValueError as e:
+                failures.append({"index": index, "ref": filename, "status": "error", "message": str(e)})
+                continue
+            searches.append({**search, 'index': index, 'ref': filename})
+    else:
+        profiles = (request.json or {}).get('profiles')
+        if not isinstance(profiles, list) or not all(isinstance(p, dict) for p in profiles):
+            raise ValueError("profiles must be a list of objects")
+        if len(profiles) > BATCH_MAX_PROFILES:
+            raise ValueError(f"At most {BATCH_MAX_PROFILES} profiles per batch")
+        for index, profile in enumerate(profiles):
+            searches.append({**form_search(profile), 'index': index, 'ref': profile.get('id')})
+    return searches, failures
+
+def batch_job_pool(searches, location, max_jobs, source):
+    """Fetch each of the most common queries once and pool the jobs, without duplicates."""
+    queries = Counter(s['query'] for s in searches if s['query']).most_common(BATCH_MAX_QUERIES)
+    pool, seen = [], set()
+    for query, _ in queries:
+        if source == 'local':
+            jobs = db.search_postings(query, location or None, max_jobs)
+        else:
+            jobs = scrape_jobs(query, location, max_jobs)
+        for job in jobs:
+            key = (job['title'].lower().strip(), (job.get('company') or '').lower().strip())
+            if key not in seen:
+                seen.add(key)
+                pool.append(dict(job))
+    return pool
+
+def batch_results(searches, pool, top_n):
+    """Score and persist each profile's matches; yields one result entry per profile."""
+    matcher = matcher_module()
+    profiles = [s['profile'] for s in searches]
+    if hasattr(matcher, 'match_profiles'):
+        ranked = matcher.match_profiles(profiles, pool, top_n)
+    else:
+        # matcher.py has no batch pass; score each profile on its own
+        ranked = (match_jobs(profile, pool)[:top_n] for profile in profiles)
+    
+    for search, jobs in zip(searches, ranked):
+        search_id = persist_search(
+            search['user_id'], search['search_type'], search['query_data'], search['keywords'], jobs)
+        yield {"index": search['index'], "ref": search['ref'], "status": "success",
+               "search_id": search_id, "jobs": jobs, **search.get('extra', {})}
+
+def wants_ndjson():
+    return 'application/x-ndjson' in request.headers.get('Accept', '') or request.args.get('stream') == '1'
+
+@app.route('/api/recommend/batch', methods=['POST'])
+@rate_limited('batch')
+def recommend_batch():
+    """
+    Recommend jobs for many profiles from one job pool.
+    
+    Body: {"profiles": [{"id", "job_title", "skills", "experience", ...}], "location", "max_jobs",
+           "top_n", "source": "live" | "local"} - or multipart with CVs in 'files' and the same options
+    """
+    try:
+        searches, failures = batch_searches()
+        if not searches and not failures:
+            return jsonify({"status": "error", "message": "No profiles"}), 400
+        
+        options = request.form if request.files else request.json
+        location = options.get('location', '')
+        max_jobs = int(options.get('max_jobs', 50))
+        top_n = int(options.get('top_n', 20))
+        source = options.get('source', 'live')
+        
+        # The whole batch is one pipeline for the admission cap
+        if not admission.pipelines.try_acquire():
+            return overloaded()
+        streaming = False
         try:
-            # Parse CV
-            parser = CVParser()
-            parsed_data = parser.parse(temp_path)
+            pool = batch_job_pool(searches, location, max_jobs, source)
+            fields = get_fields_arg()
+            results = (project_jobs(entry, fields) for entry in batch_results(searches, pool, top_n))
+            summary = {"status": "success", "profiles": len(searches), "failed": len(failures),
+                       "pool_size": len(pool)}
             
-            if "error" in parsed_data:
-                return jsonify({"status": "error", "message": parsed_data["error"]}), 400
-                
-            extracted_skills = parsed_data.get("skills", [])
-            job_title = parsed_data.get("job_title", "Unknown")
+            if not (wants_ndjson() or len(searches) > BATCH_STREAM_THRESHOLD):
+                return jsonify({**summary, "results": sorted(failures + list(results), key=lambda r: r['index'])})
             
-            # Convert list to string for matching if needed, or keep as list
-            # The matcher expects a dictionary with 'skills'
-            
-            # Scrape jobs based on extracted job title or skills
-            search_query = job_title if job_title != "Unknown" else "Software Engineer"
-            if not search_query and extracted_skills:
-                search_query = extracted_skills[0]
-                
-            jobs = scrape_jobs(search_query, "")
-            
-            # Match jobs
-            user_profile = {
-                "skills": extracted_skills,
-                "job_title": job_title
-            }
-            matched_jobs = match_jobs(user_profile, jobs)
-            
-            user_id = request.form.get('user_id')
-            skills_str = ", ".join(extracted_skills) if extracted_skills else ""
-            
-            search_id = db.save_search(user_id, 'cv', {'filename': filename, 'parsed_data': parsed_data}, skills_str)
-            db.save_job_results(search_id, matched_jobs)
-            
-            return jsonify({
-                "status": "success", 
-                "jobs": matched_jobs, 
-                "search_id": search_id,
-                "parsed_data": parsed_data
-            })
+            def lines():
+                try:
+                    for entry in failures:
+                        yield json.dumps(entry) + "\n"
+                    for entry in results:
+                        yield json.dumps(entry, default=str) + "\n"
+                    yield json.dumps(summary) + "\n"
+                except Exception as e:
+                    yield json.dumps({"status": "error", "message": str(e)}) + "\n"
             
+            response = release_pipeline_on_close(Response(
+                stream_with_context(lines()), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'}))
+            streaming = True
+            return response
         finally:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                
+            if not streaming:
+                admission.pipelines.release()
+    except RequestEntityTooLarge:
+        limit = f"{BATCH_MAX_UPLOAD_BYTES / (1024 * 1024):.3g} MB"
+        return jsonify({"status": "error", "message": f"Batch is larger than {limit}"}), 413
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/jobs/search', methods=['GET'])
+def search_stored_jobs():
+    """Full-text search over postings we've already scraped; never hits the job boards."""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"status": "error", "message": "Search query (q) required"}), 400
+        
+        max_age_days = request.args.get('max_age_days')
+        jobs = db.search_postings(
+            query,
+            location=request.args.get('location') or None,
+            limit=int(request.args.get('limit', 20)),
+            max_age_days=float(max_age_days) if max_age_days else None
+        )
+        return jsonify({"status": "success", "jobs": jobs, "count": len(jobs)})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -172,7 +707,12 @@ def signup():
         # Send welcome email
         email_utils.send_welcome_email(email, full_name or 'User')
         
-        return jsonify({"status": "success", "message": "Account created successfully", "user_id": user_id})
+        return jsonify({
+            "status": "success",
+            "message": "Account created successfully",
+            "user_id": user_id,
+            "token": sessions.issue_token({'id': user_id, 'password_hash': password_hash})
+        })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -196,6 +736,7 @@ def login():
         return jsonify({
             "status": "success",
             "message": "Login successful",
+            "token": sessions.issue_token(user),
             "user": {
                 "id": user['id'],
                 "email": user['email'],
@@ -271,17 +812,10 @@ def reset_password():
 # ============= USER PROFILE ENDPOINTS =============
 
 @app.route('/api/user/profile', methods=['GET'])
+@login_required
 def get_profile():
     try:
-        user_id = request.args.get('user_id')
-        
-        if not user_id:
-            return jsonify({"status": "error", "message": "User ID required"}), 400
-        
-        user = db.get_user_by_id(int(user_id))
-        
-        if not user:
-            return jsonify({"status": "error", "message": "User not found"}), 404
+        user = dict(g.user)
         
         # Don't send password hash
         user.pop('password_hash', None)
@@ -291,17 +825,14 @@ def get_profile():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/user/profile', methods=['PUT'])
+@login_required
 def update_profile():
     try:
         data = request.json
-        user_id = data.get('user_id')
         full_name = data.get('full_name')
         email = data.get('email')
         
-        if not user_id:
-            return jsonify({"status": "error", "message": "User ID required"}), 400
-        
-        success = db.update_user_profile(int(user_id), full_name, email)
+        success = db.update_user_profile(g.user['id'], full_name, email)
         
         if not success:
             return jsonify({"status": "error", "message": "Email already exists"}), 400
@@ -311,37 +842,41 @@ def update_profile():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/user/change-password', methods=['POST'])
+@login_required
 def change_password():
     try:
         data = request.json
-        user_id = data.get('user_id')
         current_password = data.get('current_password')
         new_password = data.get('new_password')
         
-        if not all([user_id, current_password, new_password]):
+        if not all([current_password, new_password]):
             return jsonify({"status": "error", "message": "All fields required"}), 400
         
-        user = db.get_user_by_id(int(user_id))
+        user = g.user
         
-        if not user or user['password_hash'] != hash_password(current_password):
+        if user['password_hash'] != hash_password(current_password):
             return jsonify({"status": "error", "message": "Current password incorrect"}), 401
         
         new_password_hash = hash_password(new_password)
-        db.update_user_password(int(user_id), new_password_hash)
+        db.update_user_password(user['id'], new_password_hash)
         
-        return jsonify({"status": "success", "message": "Password changed successfully"})
+        # The new password ends every other session; this one continues with a new token
+        return jsonify({
+            "status": "success",
+            "message": "Password changed successfully",
+            "token": sessions.issue_token({**user, 'password_hash': new_password_hash})
+        })
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/user/upload-photo', methods=['POST'])
+@login_required
 def upload_photo():
     try:
         if 'photo' not in request.files:
             return jsonify({"status": "error", "message": "No photo uploaded"}), 400
         
-        user_id = request.form.get('user_id')
-        if not user_id:
-            return jsonify({"status": "error", "message": "User ID required"}), 400
+        user_id = g.user['id']
         
         photo = request.files['photo']
         
@@ -369,7 +904,7 @@ def upload_photo():
         
         # Update database
         photo_url = f"/uploads/profiles/{unique_filename}"
-        db.update_profile_photo(int(user_id), photo_url)
+        db.update_profile_photo(user_id, photo_url)
         
         return jsonify({
             "status": "success",
@@ -382,39 +917,61 @@ def upload_photo():
 # ============= SEARCH HISTORY & SAVED JOBS =============
 
 @app.route('/api/user/searches', methods=['GET'])
+@login_required
 def get_searches():
     try:
-        user_id = request.args.get('user_id')
-        
-        if not user_id:
-            return jsonify({"status": "error", "message": "User ID required"}), 400
+        cursor, limit = get_page_args(10)
+        searches, next_cursor = db.get_user_searches_page(g.user['id'], cursor, limit)
         
-        searches = db.get_user_searches(int(user_id))
-        
-        return jsonify({"status": "success", "searches": searches})
+        return jsonify({"status": "success", "searches": searches, "next_cursor": next_cursor})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/search/<int:search_id>/results', methods=['GET'])
+@http_cache.conditional
 def get_search_results_api(search_id):
     try:
-        results = db.get_search_results(search_id)
-        return jsonify({"status": "success", "jobs": results})
+        fields = get_fields_arg(db.JOB_LIST_FIELDS)
+        if not wants_page():
+            results = db.get_search_results(search_id, fields)
+            return jsonify({"status": "success", "jobs": results})
+        
+        cursor, limit = get_page_args(20)
+        results, next_cursor = db.get_search_results_page(search_id, cursor, limit, fields)
+        return jsonify({"status": "success", "jobs": results, "next_cursor": next_cursor})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/jobs/<int:job_result_id>', methods=['GET'])
+@http_cache.conditional
+def get_job_result_api(job_result_id):
+    """Every field of one job result (list endpoints leave out the description)."""
+    try:
+        job = db.get_job_result(job_result_id, get_fields_arg())
+        if job is None:
+            return jsonify({"status": "error", "message": "Job not found"}), 404
+        return jsonify({"status": "success", "job": job})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/user/save-job', methods=['POST'])
+@login_required
 def save_job_endpoint():
     try:
         data = request.json
-        user_id = data.get('user_id')
         job_result_id = data.get('job_result_id')
         notes = data.get('notes', '')
         
-        if not all([user_id, job_result_id]):
-            return jsonify({"status": "error", "message": "User ID and job ID required"}), 400
+        if not job_result_id:
+            return jsonify({"status": "error", "message": "Job ID required"}), 400
         
-        saved_id = db.save_job(int(user_id), int(job_result_id), notes)
+        saved_id = db.save_job(g.user['id'], int(job_result_id), notes)
         
         if saved_id is None:
             return jsonify({"status": "error", "message": "Job already saved"}), 400
@@ -424,28 +981,29 @@ def save_job_endpoint():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/user/saved-jobs', methods=['GET'])
+@login_required
 def get_saved_jobs_endpoint():
     try:
-        user_id = request.args.get('user_id')
-        
-        if not user_id:
-            return jsonify({"status": "error", "message": "User ID required"}), 400
-        
-        saved_jobs = db.get_saved_jobs(int(user_id))
-        
-        return jsonify({"status": "success", "jobs": saved_jobs})
+        user_id = g.user['id']
+        fields = get_fields_arg(db.SAVED_JOB_LIST_FIELDS)
+        if not wants_page():
+            saved_jobs = db.get_saved_jobs(user_id, fields)
+            return jsonify({"status": "success", "jobs": saved_jobs})
+        
+        cursor, limit = get_page_args(20)
+        saved_jobs, next_cursor = db.get_saved_jobs_page(user_id, cursor, limit, fields)
+        
+        return jsonify({"status": "success", "jobs": saved_jobs, "next_cursor": next_cursor})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/user/saved-job/<int:saved_id>', methods=['DELETE'])
+@login_required
 def unsave_job_endpoint(saved_id):
     try:
-        user_id = request.args.get('user_id')
-        
-        if not user_id:
-            return jsonify({"status": "error", "message": "User ID required"}), 400
-        
-        db.unsave_job(int(user_id), saved_id)
+        db.unsave_job(g.user['id'], saved_id)
         
         return jsonify({"status": "success", "message": "Job removed from saved"})
     except Exception as e:
@@ -473,89 +1031,68 @@ def contact_submit():
 
 # ============= PDF EXPORT =============
 
+def send_pdf(jobs, user_name, search_id=None):
+    path, cache_hit = pdf_export.get_pdf(jobs, user_name, search_id)
+    # Streamed from the cached file in blocks, with ETag / Range support
+    response = send_file(
+        path,
+        as_attachment=True,
+        download_name=f'job_recommendations_{datetime.now().strftime("%Y%m%d")}.pdf',
+        mimetype='application/pdf',
+        conditional=True
+    )
+    response.headers['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+    return response
+
 @app.route('/api/export/pdf', methods=['POST'])
+@rate_limited('export')
 def export_pdf():
+    """Render a PDF of a stored search ({"search_id"}) or of the jobs posted ({"jobs"})."""
     try:
         data = request.json
-        jobs = data.get('jobs', [])
-        user_name = data.get('user_name', 'User')
-        
-        # Create PDF in memory
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#6366f1'),
-            spaceAfter=30,
-        )
-        elements.append(Paragraph(f"Job Recommendations for {user_name}", title_style))
-        elements.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Jobs
-        for idx, job in enumerate(jobs, 1):
-            # Job header
-            job_title_style = ParagraphStyle(
-                'JobTitle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor('#1e293b'),
-                spaceAfter=10,
-            )
-            elements.append(Paragraph(f"{idx}. {job.get('title', 'N/A')}", job_title_style))
-            
-            # Job details table
-            job_data = [
-                ['Company:', job.get('company', 'N/A')],
-                ['Location:', job.get('location', 'N/A')],
-                ['Match Score:', f"{job.get('match_score', 0)}%"],
-                ['Platform:', job.get('platform', 'N/A')],
-            ]
-            
-            job_table = Table(job_data, colWidths=[1.5*inch, 4.5*inch])
-            job_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#64748b')),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(job_table)
-            elements.append(Spacer(1, 0.1*inch))
-            
-            # Description
-            desc = job.get('description', 'No description available')[:300] + '...'
-            elements.append(Paragraph(f"<b>Description:</b> {desc}", styles['Normal']))
-            
-            # Skills
-            skills = job.get('skills', [])
-            if skills:
-                skills_text = ', '.join(skills[:10])
-                elements.append(Paragraph(f"<b>Skills:</b> {skills_text}", styles['Normal']))
-            
-            elements.append(Spacer(1, 0.3*inch))
-        
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-        
-        # Send file
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name=f'job_recommendations_{datetime.now().strftime("%Y%m%d")}.pdf',
-            mimetype='application/pdf'
-        )
+        user_name = data.get('user_name') or 'User'
+        search_id = int(data['search_id']) if str(data.get('search_id')).isdigit() else None
+        
+        jobs = db.get_search_results(search_id) if search_id else []
+        if not jobs:
+            # Results of a search that's still in the write-behind queue come from the client
+            jobs, search_id = data.get('jobs', []), None
+        if not jobs:
+            return jsonify({"status": "error", "message": "No jobs to export"}), 400
+        
+        return send_pdf(jobs, user_name, search_id)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/export/pdf/<int:search_id>', methods=['GET'])
+@rate_limited('export')
+def export_search_pdf(search_id):
+    """Download link for a stored search's PDF: /api/export/pdf/<search_id>?user_name=..."""
+    try:
+        jobs = db.get_search_results(search_id)
+        if not jobs:
+            return jsonify({"status": "error", "message": "Search not found"}), 404
+        return send_pdf(jobs, request.args.get('user_name') or 'User', search_id)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# ============= METRICS =============
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Latency histograms, queue gauges and admission counters in the Prometheus text format."""
+    queue_stats = task_queue.stats()
+    cache_stats = sessions.user_cache.stats()
+    gauges = [
+        ('neuronix_tasks_queued', 'Recommendation tasks waiting for a worker', queue_stats['queued']),
+        ('neuronix_tasks_running', 'Recommendation tasks being worked on', queue_stats['tasks'].get(tasks.RUNNING, 0)),
+        ('neuronix_search_writes_pending', 'Searches waiting to be written', search_writer.pending()),
+        ('neuronix_user_cache_size', 'Users in the session cache', cache_stats['size']),
+    ]
+    return Response(tracing.render_metrics(gauges, extra=[admission.render_metrics()]),
+                    mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    print("Starting Neuronix AI JobFlow Server...")
-    app.run(debug=True, port=5000)
+    # Development server with the reloader; use wsgi.py in production
+    log.info("Starting Neuronix AI JobFlow Server...")
+    app.run(debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true', port=int(os.getenv('WEB_PORT', '5000')))
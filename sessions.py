@@ -0,0 +1,150 @@
+"""
+Signed session tokens, and a per-process cache of the users they belong to.
+
+Login returns a token that the client sends back as "Authorization: Bearer
+<token>". A token is the user id, a fingerprint of the password hash and an
+expiry time, signed with HMAC-SHA256 under SECRET_KEY. Nothing is stored
+server-side. Changing or resetting the password changes the fingerprint,
+which ends every existing session.
+
+Authenticated requests read their user from an LRU cache instead of the
+database. database.py reports each profile, password or photo change, and
+the cached copy is dropped. Other worker processes keep their copy until
+SESSION_USER_CACHE_TTL_SECONDS passes.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import database as db
+
+log = logging.getLogger(__name__)
+
+SECRET_KEY = os.getenv('SECRET_KEY', '')
+if not SECRET_KEY:
+    SECRET_KEY = secrets.token_hex(32)
+    log.warning("⚠ SECRET_KEY is not set: sessions end when the server restarts and only work with one worker")
+
+MAX_AGE = int(float(os.getenv('SESSION_MAX_AGE_HOURS', '168')) * 3600)
+CACHE_SIZE = int(os.getenv('SESSION_USER_CACHE_SIZE', '1024'))
+CACHE_TTL = float(os.getenv('SESSION_USER_CACHE_TTL_SECONDS', '60'))
+
+
+class UserCache:
+    """LRU cache of user rows by id; entries expire after ``ttl`` seconds."""
+
+    def __init__(self, loader, max_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self._loader = loader
+        self.max_size = max_size
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a load that raced one isn't cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """A copy of the user's row, loading it on a miss; None if there is no such user."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry and entry[0] > now:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return dict(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        user = self._loader(user_id)
+        if user is None:
+            return None
+        with self._lock:
+            if generation == self._generation:
+                self._users[user_id] = (now + self.ttl, user)
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_size:
+                    self._users.popitem(last=False)
+        return dict(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._users), 'capacity': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserCache(db.get_user_by_id)
+db.on_user_changed(user_cache.invalidate)
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64encode(hmac.new(SECRET_KEY.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).digest())
+
+
+def _password_fingerprint(user):
+    return hashlib.sha256((user.get('password_hash') or '').encode('utf-8')).hexdigest()[:16]
+
+
+def issue_token(user, max_age=None):
+    """A signed session token for ``user`` (a users row), valid for ``max_age`` seconds (default MAX_AGE)."""
+    expires_at = int(time.time()) + (MAX_AGE if max_age is None else max_age)
+    payload = _b64encode(json.dumps([user['id'], _password_fingerprint(user), expires_at],
+                                    separators=(',', ':')).encode('utf-8'))
+    return f"{payload}.{_sign(payload)}"
+
+
+def authenticate(token):
+    """
+    The user a session token belongs to.
+
+    Returns:
+        dict: the user's row (from the cache), or None if the token is forged,
+              expired, or was issued before a password change
+    """
+    payload, _, signature = (token or '').partition('.')
+    if not payload or not hmac.compare_digest(signature.encode('utf-8'), _sign(payload).encode('ascii')):
+        return None
+    try:
+        user_id, fingerprint, expires_at = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if expires_at < time.time():
+        return None
+
+    user = user_cache.get(user_id)
+    if user is None or not hmac.compare_digest(fingerprint, _password_fingerprint(user)):
+        return None
+    return user
+
+
+def bearer_token(authorization):
+    """The token from an "Authorization: Bearer <token>" header value, or None."""
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer':
+        return None
+    return token.strip() or None
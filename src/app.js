@@ -16,10 +16,31 @@ export function showToast(message, type = "success") {
 // Backend API URL
 export const API_URL = "http://localhost:5000";
 
+// Session token from login, sent as "Authorization: Bearer <token>"
+export function authHeaders() {
+  const user = JSON.parse(localStorage.getItem("user") || sessionStorage.getItem("user") || "null");
+  return user && user.token ? { Authorization: `Bearer ${user.token}` } : {};
+}
+
+// The session is missing or has ended (e.g. the password changed): log in again
+function endSession() {
+  localStorage.removeItem("user");
+  sessionStorage.removeItem("user");
+  window.location.href = "login.html";
+}
+
+// Error text for a failed response; rate limited and overloaded answers say when to retry
+function errorMessage(response, data) {
+  const message = data.message || "API Request Failed";
+  const retryAfter = response.headers.get("Retry-After");
+  return retryAfter ? `${message} (retry in ${retryAfter}s)` : message;
+}
+
 // API Helper
 export async function apiCall(endpoint, method = "GET", body = null) {
   const headers = {
     "Content-Type": "application/json",
+    ...authHeaders(),
   };
 
   const config = {
@@ -35,8 +56,11 @@ export async function apiCall(endpoint, method = "GET", body = null) {
     const response = await fetch(`${API_URL}${endpoint}`, config);
     const data = await response.json();
 
+    if (response.status === 401 && data.login_required) {
+      endSession();
+    }
     if (!response.ok) {
-      throw new Error(data.message || "API Request Failed");
+      throw new Error(errorMessage(response, data));
     }
 
     return data;
@@ -46,6 +70,49 @@ export async function apiCall(endpoint, method = "GET", body = null) {
   }
 }
 
+// Full details of one stored job result (list endpoints leave out the description)
+export async function loadJobDetails(jobResultId) {
+  const data = await apiCall(`/api/jobs/${jobResultId}`);
+  return data.job;
+}
+
+// Streaming API Helper: POSTs to a /stream endpoint and calls
+// onEvent(name, data) for each Server-Sent Event ("jobs", "done" or "error")
+export async function streamRecommendations(endpoint, body, onEvent) {
+  const isForm = body instanceof FormData;
+  const response = await fetch(`${API_URL}${endpoint}`, {
+    method: "POST",
+    headers: isForm ? authHeaders() : { "Content-Type": "application/json", ...authHeaders() },
+    body: isForm ? body : JSON.stringify(body),
+  });
+
+  if (!response.ok) {
+    const data = await response.json();
+    throw new Error(errorMessage(response, data));
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+
+    // Events are separated by a blank line
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const lines = buffer.slice(0, end).split("\n");
+      buffer = buffer.slice(end + 2);
+      const name = lines.find((l) => l.startsWith("event: "))?.slice(7) || "message";
+      const data = lines
+        .filter((l) => l.startsWith("data: "))
+        .map((l) => l.slice(6))
+        .join("\n");
+      onEvent(name, JSON.parse(data));
+    }
+  }
+}
+
 // Navbar Logic (Mobile Toggle if needed, currently simple)
 document.addEventListener("DOMContentLoaded", () => {
   // Highlight active link
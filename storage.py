@@ -0,0 +1,292 @@
+"""
+Storage backends for database.py.
+
+database.py runs the same SQL against every backend: qmark (?) placeholders,
+ON CONFLICT, row-value comparisons and LIMIT all work on both engines. It
+talks to a sqlite3-style connection (execute / executemany / executescript /
+commit / rollback / close), and rows can be read by position or column name,
+like sqlite3.Row. A backend method covers each of the few operations whose
+SQL really differs: taking the write lock, allocating ids, creating the
+schema and full-text search.
+
+- SQLiteBackend: a local database file (the default)
+- PostgresBackend: a PostgreSQL server behind a connection pool, so several
+  app nodes can share one database. Selected with DATABASE_URL=postgresql://...
+  and needs: pip install "psycopg[binary]" psycopg_pool
+"""
+
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+
+SCHEMA_DIR = Path(__file__).parent
+
+# Relative weight of each searchable posting field: job_title, company, description, skills
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 5.0)
+
+
+def fts5_query(terms, match_all=False):
+    """Quoted prefix terms for an FTS5 MATCH, so input can't inject query syntax."""
+    return (" AND " if match_all else " OR ").join(f'"{t}"*' for t in terms)
+
+
+# ============= SQLITE =============
+
+def sequence_value(conn, table):
+    """Highest id AUTOINCREMENT has handed out (or that exists) for a table."""
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    return max(seq['seq'] if seq else 0, max_id)
+
+
+def set_sequence(conn, table, value):
+    if conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (value, table)).rowcount == 0:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, value))
+
+
+class SQLiteBackend:
+    """A SQLite file; one connection per call, WAL mode for concurrent readers."""
+
+    name = 'sqlite'
+    IntegrityError = sqlite3.IntegrityError
+    # Versioned migrations in database.py are written against SQLite
+    runs_migrations = True
+
+    def __init__(self, path, timeout=5.0, pragmas=(), on_connect=None):
+        """
+        Args:
+            path: database file
+            timeout: seconds to wait for another writer's lock
+            pragmas: per-connection PRAGMA assignments, e.g. "synchronous = NORMAL"
+            on_connect: called with each new connection (e.g. to register SQL functions)
+        """
+        self.path = path
+        self.timeout = timeout
+        self.pragmas = list(pragmas)
+        self.on_connect = on_connect
+        self._fts_ready = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        for pragma in self.pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    def create_schema(self, conn):
+        # Must precede anything that writes page 1; existing files switch over on their next vacuum()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL lets readers and a writer run concurrently instead of locking the file
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript((SCHEMA_DIR / "schema.sql").read_text())
+        conn.commit()
+
+    def begin_write(self, conn):
+        """Take the write lock now, so the transaction never has to upgrade (and deadlock) later."""
+        conn.execute("BEGIN IMMEDIATE")
+
+    def insert(self, conn, sql, params):
+        """Run an INSERT and return the new row's id."""
+        return conn.execute(sql, params).lastrowid
+
+    def next_ids(self, conn, table, count):
+        """Take ``count`` ids from a table's AUTOINCREMENT sequence. Call after begin_write."""
+        current = sequence_value(conn, table)
+        set_sequence(conn, table, current + count)
+        return list(range(current + 1, current + count + 1))
+
+    def index_postings(self, conn, postings):
+        """Nothing to do: the postings_fts triggers index new postings."""
+
+    def search_postings(self, conn, columns, terms, match_all, filters, params, limit):
+        """BM25 over postings_fts; `rank MATCH` lets FTS5 sort without a temp B-tree."""
+        if not self._fts_ready:
+            # The index is created by a migration queued behind any pending backfill;
+            # until then there is no local search, rather than an error per query
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'postings_fts'")
+            if exists.fetchone() is None:
+                return []
+            self._fts_ready = True
+        return conn.execute(
+            f"""SELECT {columns}, -postings_fts.rank AS score
+                FROM postings_fts
+                JOIN postings p ON p.id = postings_fts.rowid
+                WHERE postings_fts MATCH ? AND postings_fts.rank MATCH ? {filters}
+                ORDER BY postings_fts.rank
+                LIMIT ?""",
+            (fts5_query(terms, match_all), f"bm25({', '.join(map(str, FTS_WEIGHTS))})", *params, limit)
+        ).fetchall()
+
+    def close(self):
+        pass
+
+
+# ============= POSTGRESQL =============
+
+@lru_cache(maxsize=512)
+def _pg_sql(sql):
+    """Rewrite qmark placeholders in database.py's SQL to psycopg's %s style."""
+    return sql.replace('%', '%%').replace('?', '%s')
+
+
+class PostgresRow:
+    """A result row readable by position or column name, like sqlite3.Row."""
+
+    __slots__ = ('_values', '_index')
+
+    def __init__(self, values, index):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return self._values[key]
+
+    def keys(self):
+        return list(self._index)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return f"PostgresRow({dict(zip(self._index, self._values))})"
+
+
+def _row_factory(cursor):
+    index = {column.name: i for i, column in enumerate(cursor.description or ())}
+    return lambda values: PostgresRow(values, index)
+
+
+class PostgresConnection:
+    """A connection borrowed from the pool, with the sqlite3.Connection methods database.py uses."""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = pool.getconn()
+
+    def execute(self, sql, params=()):
+        if not params:
+            return self._conn.execute(sql)
+        return self._conn.execute(_pg_sql(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        cursor = self._conn.cursor()
+        cursor.executemany(_pg_sql(sql), list(seq_of_params))
+        return cursor
+
+    def executescript(self, script):
+        self._conn.execute(script)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        """Return the connection to the pool, discarding any uncommitted work."""
+        from psycopg.pq import TransactionStatus
+        
+        if self._conn is None:
+            return
+        if self._conn.info.transaction_status != TransactionStatus.IDLE:
+            self._conn.rollback()
+        self._pool.putconn(self._conn)
+        self._conn = None
+
+
+def _configure(conn):
+    from psycopg.types.string import TextLoader
+    
+    # Timestamps come back as text, formatted the way SQLite stores them
+    for type_name in ('timestamp', 'timestamptz'):
+        conn.adapters.register_loader(type_name, TextLoader)
+
+
+class PostgresBackend:
+    """A PostgreSQL server shared by every app node, reached through a connection pool."""
+
+    name = 'postgres'
+    runs_migrations = False  # schema_postgres.sql is already at the latest version
+
+    def __init__(self, url, min_size=1, max_size=10, timeout=5.0):
+        # Imported here, so SQLite-only processes never load psycopg (~150 ms)
+        try:
+            import psycopg
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise RuntimeError('DATABASE_URL needs psycopg: pip install "psycopg[binary]" psycopg_pool')
+        self.IntegrityError = psycopg.IntegrityError
+        self.pool = ConnectionPool(
+            url, min_size=min_size, max_size=max_size, timeout=timeout,
+            kwargs={'row_factory': _row_factory}, configure=_configure, open=True
+        )
+
+    def connect(self):
+        return PostgresConnection(self.pool)
+
+    def create_schema(self, conn):
+        # Several nodes may start at once; the advisory lock serializes their CREATE ... IF NOT EXISTS
+        conn.execute("SELECT pg_advisory_xact_lock(hashtext('neuronix_schema'))")
+        conn.executescript((SCHEMA_DIR / "schema_postgres.sql").read_text())
+        conn.commit()
+
+    def begin_write(self, conn):
+        """Nothing to do: psycopg opens a transaction with the first statement, and rows lock as they're written."""
+
+    def insert(self, conn, sql, params):
+        return conn.execute(f"{sql} RETURNING id", params).fetchone()[0]
+
+    def next_ids(self, conn, table, count):
+        """Draw ``count`` ids from the table's identity sequence (not necessarily contiguous)."""
+        return [
+            row[0] for row in conn.execute(
+                "SELECT nextval(pg_get_serial_sequence(?, 'id')) FROM generate_series(1, ?)", (table, count)
+            )
+        ]
+
+    def index_postings(self, conn, postings):
+        """
+        Fill search_vector for new postings. The stored description is
+        compressed, so the text comes from Python rather than a trigger.
+
+        Args:
+            postings: (posting_id, job) pairs
+        """
+        conn.executemany(
+            """UPDATE postings SET search_vector =
+                   setweight(to_tsvector('english', ?), 'A') ||
+                   setweight(to_tsvector('english', ?), 'C') ||
+                   setweight(to_tsvector('english', ?), 'D') ||
+                   setweight(to_tsvector('english', ?), 'B')
+               WHERE id = ?""",
+            [
+                (job.get('title') or '', job.get('company') or '', job.get('description') or '',
+                 ", ".join(job.get('skills') or []), posting_id)
+                for posting_id, job in postings
+            ]
+        )
+
+    def search_postings(self, conn, columns, terms, match_all, filters, params, limit):
+        """ts_rank over the GIN-indexed search_vector; weights follow FTS_WEIGHTS' order of importance."""
+        query = (" & " if match_all else " | ").join(f"{t}:*" for t in terms)
+        return conn.execute(
+            f"""SELECT {columns}, ts_rank('{{0.1, 0.4, 0.5, 1.0}}', p.search_vector, q) AS score
+                FROM postings p, to_tsquery('english', ?) q
+                WHERE p.search_vector @@ q {filters}
+                ORDER BY score DESC, p.id
+                LIMIT ?""",
+            (query, *params, limit)
+        ).fetchall()
+
+    def close(self):
+        self.pool.close()
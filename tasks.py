@@ -0,0 +1,215 @@
+"""
+Background recommendation tasks.
+
+In async mode the recommendation endpoints submit the scrape + match + persist
+pipeline to a TaskQueue and answer with a task_id straight away. A fixed pool
+of worker threads runs the pipelines; clients poll (or long-poll) the task for
+its result. The queue is bounded: when it's full, submit() raises QueueFull and
+the endpoint answers 429, so a burst of slow searches can't pile up without limit.
+
+Cancellation is cooperative: a queued task never starts, and a running task
+stops at its next checkpoint (between scraping, matching and persisting).
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv('RECOMMEND_WORKERS', '4'))
+QUEUE_SIZE = int(os.getenv('RECOMMEND_QUEUE_SIZE', '32'))
+# Finished tasks (and their results) are kept this long for clients to collect
+RESULT_TTL = int(os.getenv('RECOMMEND_TASK_TTL_SECONDS', '600'))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_STOP = object()
+
+
+class QueueFull(Exception):
+    """The task queue is at capacity; retry later."""
+
+
+class TaskCancelled(Exception):
+    """Raised at a checkpoint when the task has been cancelled."""
+
+
+class Task:
+    """One pipeline run and its outcome."""
+
+    def __init__(self, func, args):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def checkpoint(self):
+        """Stop here if the task was cancelled. Pipelines call this between stages."""
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def wait(self, timeout=None):
+        """Block until the task finishes or ``timeout`` seconds pass; returns True if finished."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        task = {
+            'task_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            task['result'] = self.result
+        elif self.status == FAILED:
+            task['error'] = self.error
+        return task
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.func = self.args = None  # Let the request payload be collected
+        self._done.set()
+
+
+class TaskQueue:
+    """Bounded queue of tasks run by a pool of daemon worker threads."""
+
+    def __init__(self, workers=WORKERS, max_queued=QUEUE_SIZE, result_ttl=RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f'recommend-worker-{n}', daemon=True)
+            for n in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, *args):
+        """
+        Queue ``func(task, *args)``; its return value becomes the task result.
+
+        Returns:
+            Task: the queued task
+
+        Raises:
+            QueueFull: when ``max_queued`` tasks are already waiting
+        """
+        if self._closed:
+            raise RuntimeError("TaskQueue is closed")
+
+        task = Task(func, args)
+        self._expire()
+        with self._lock:
+            self._tasks[task.id] = task
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            with self._lock:
+                del self._tasks[task.id]
+            raise QueueFull(f"{self._queue.maxsize} tasks already queued")
+        return task
+
+    def get(self, task_id):
+        """The task with this id, or None if it is unknown or has expired."""
+        self._expire()
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def cancel(self, task_id):
+        """
+        Ask a task to stop.
+
+        Returns:
+            Task: the task (its status shows whether it had already finished),
+                  or None if it is unknown
+        """
+        task = self.get(task_id)
+        if task is None:
+            return None
+        with self._lock:
+            if task.status in FINISHED:
+                return task
+            task._cancel.set()
+            if task.status == QUEUED:
+                # The worker that dequeues it will skip it
+                task._finish(CANCELLED)
+        return task
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for task in self._tasks.values():
+                counts[task.status] = counts.get(task.status, 0) + 1
+        return {'queued': self._queue.qsize(), 'capacity': self._queue.maxsize,
+                'workers': len(self._threads), 'tasks': counts}
+
+    def close(self, timeout=None):
+        """Cancel queued tasks and stop the workers once running tasks finish (waiting up to ``timeout`` seconds)."""
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.cancel(task.id)
+        with self._queue.mutex:
+            self._queue.maxsize = 0  # Room for every worker's stop marker
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for task_id in [t.id for t in self._tasks.values() if t.finished_at and t.finished_at < cutoff]:
+                del self._tasks[task_id]
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                break
+
+            with self._lock:
+                if task.status != QUEUED:
+                    continue  # Cancelled while it waited
+                task.status = RUNNING
+                task.started_at = time.time()
+
+            try:
+                result = task.func(task, *task.args)
+            except TaskCancelled:
+                task._finish(CANCELLED)
+            except Exception as e:
+                log.exception("✗ Task %s failed", task.id, extra={'task_id': task.id})
+                task._finish(FAILED, error=str(e))
+            else:
+                # A cancel that arrives after the last checkpoint is too late to matter
+                task._finish(SUCCEEDED, result=result)
@@ -0,0 +1,174 @@
+"""
+Test script for CV parsing from uploads held in memory
+
+Usage:
+    python test_cv_parser.py       # prints a report
+    python -m pytest test_cv_parser.py
+"""
+
+import io
+import os
+import tempfile
+import time
+
+import pytest
+
+import cv_parser
+from cv_parser import CVParser
+
+CV_LINES = [
+    "Jane Doe - Senior Data Scientist",
+    "jane.doe@example.com | +1 555-123-4567",
+    "Skills: Python, SQL, TensorFlow, Docker, AWS",
+]
+# Enough on one page for the parser to stop reading (see cv_parser.ENOUGH_SKILLS)
+RICH_CV_LINES = CV_LINES + ["Also: Pandas, NumPy, Kubernetes, Git, Linux, Airflow"]
+
+
+def make_pdf(lines=CV_LINES, pages=1):
+    """A CV as PDF bytes: ``lines`` on the first page, pages of project history after it."""
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(pages):
+        text = lines if page == 0 else [f"Project {page}.{n}: maintained internal tooling, reports and dashboards."
+                                         for n in range(45)]
+        for i, line in enumerate(text):
+            pdf.drawString(72, 760 - 16 * i, line)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def make_docx(lines=CV_LINES):
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_bytes_streams_and_paths_parse_alike():
+    pdf = make_pdf()
+    from_bytes = CVParser().parse(pdf, 'cv.pdf')
+    from_stream = CVParser().parse(io.BytesIO(pdf), 'cv.pdf')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cv.pdf')
+        with open(path, 'wb') as f:
+            f.write(pdf)
+        from_path = CVParser().parse(path)
+
+    assert from_bytes == from_stream == from_path
+    assert from_bytes['email'] == 'jane.doe@example.com'
+    assert from_bytes['job_title'] == 'Data Scientist'
+    assert {'python', 'sql', 'tensorflow', 'docker', 'aws'} <= set(from_bytes['skills'])
+
+    parsed = CVParser().parse(make_docx(), 'cv.docx')
+    assert parsed['email'] == 'jane.doe@example.com'
+
+
+def test_wrong_or_unsupported_files_are_rejected_unparsed():
+    with pytest.raises(ValueError, match='Unsupported'):
+        CVParser().parse(b'plain text', 'cv.txt')
+    with pytest.raises(ValueError, match='not a valid PDF'):
+        CVParser().parse(make_docx(), 'cv.pdf')
+    with pytest.raises(ValueError, match='not a valid DOCX'):
+        CVParser().parse(make_pdf(), 'cv.docx')
+
+
+def test_reading_stops_at_the_page_budget_or_enough_signal():
+    long_cv = make_pdf(pages=30)
+    text = CVParser().extract_text_from_pdf(io.BytesIO(long_cv), max_pages=5)
+    assert 'Project 4.0' in text and 'Project 5.0' not in text
+
+    # Email, title and 8+ skills on page 1: the other 29 pages aren't read
+    text = CVParser().extract_text_from_pdf(io.BytesIO(make_pdf(RICH_CV_LINES, pages=30)))
+    assert 'jane.doe@example.com' in text and 'Project' not in text
+
+
+def test_parallel_extraction_matches_serial(monkeypatch):
+    long_cv = make_pdf(pages=16)
+    monkeypatch.setattr(cv_parser, 'ENOUGH_SKILLS', 0)
+    monkeypatch.setattr(cv_parser, 'PDF_WORKERS', 1)
+    serial = CVParser().extract_text_from_pdf(io.BytesIO(long_cv))
+    monkeypatch.setattr(cv_parser, 'PDF_WORKERS', 2)
+    monkeypatch.setattr(cv_parser, 'PARALLEL_MIN_PAGES', 4)
+    parallel = CVParser().extract_text_from_pdf(io.BytesIO(long_cv))
+    assert cv_parser._pool is not None  # The pool did the extracting
+    assert parallel == serial and 'Project 15.44' in parallel
+
+
+def test_uploads_over_the_cap_are_refused():
+    assert cv_parser.read_upload(io.BytesIO(b'x' * 100), max_bytes=100) == b'x' * 100
+    with pytest.raises(cv_parser.CVTooLarge):
+        cv_parser.read_upload(io.BytesIO(b'x' * 101), max_bytes=100)
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" " * 20 + "NEURONIX AI JOBFLOW - CV PARSER TEST")
+    print("=" * 80)
+
+    print("\nEXTRACTING TEXT FROM GENERATED CVS (ms per CV, best of 3):")
+    print("-" * 80)
+    settings = {
+        'every page, serial': dict(MAX_PAGES=10**6, ENOUGH_SKILLS=0, PDF_WORKERS=1),
+        'page budget, serial': dict(ENOUGH_SKILLS=0, PDF_WORKERS=1),
+        'page budget, parallel': dict(ENOUGH_SKILLS=0),
+        'budget + early stop, parallel': dict(),
+    }
+    # At least 2 workers, even on 1 CPU (where CV_PDF_WORKERS defaults to 1 and the pool is off)
+    cv_parser.PDF_WORKERS = max(2, cv_parser.PDF_WORKERS)
+    defaults = {name: getattr(cv_parser, name) for name in ('MAX_PAGES', 'ENOUGH_SKILLS', 'PDF_WORKERS')}
+    fixtures = {pages: make_pdf(RICH_CV_LINES, pages) for pages in (1, 4, 12, 40, 100)}
+    cv_parser._pdf_pool()  # Start the pool's processes outside the timings
+    print(f"  {'pages':>5}  " + "  ".join(f"{label:>29}" for label in settings))
+    for pages, data in fixtures.items():
+        timings = []
+        for overrides in settings.values():
+            for name, value in {**defaults, **overrides}.items():
+                setattr(cv_parser, name, value)
+            best = float('inf')
+            for _ in range(3):
+                start = time.perf_counter()
+                CVParser().extract_text_from_pdf(io.BytesIO(data))
+                best = min(best, time.perf_counter() - start)
+            timings.append(best * 1000)
+        print(f"  {pages:>5}  " + "  ".join(f"{ms:>29.1f}" for ms in timings))
+    for name, value in defaults.items():
+        setattr(cv_parser, name, value)
+    print(f"  (MAX_PAGES={cv_parser.MAX_PAGES}, ENOUGH_SKILLS={cv_parser.ENOUGH_SKILLS}, "
+          f"PARALLEL_MIN_PAGES={cv_parser.PARALLEL_MIN_PAGES}, PDF_WORKERS={cv_parser.PDF_WORKERS})")
+
+    print("\nPARSING A 2-PAGE PDF 50 TIMES:")
+    print("-" * 80)
+    pdf = make_pdf(pages=2)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        for i in range(50):
+            # What the upload endpoint used to do: write, parse from disk, delete
+            path = os.path.join(directory, f"{i}_cv.pdf")
+            with open(path, 'wb') as f:
+                f.write(pdf)
+            CVParser().parse(path)
+            os.remove(path)
+        via_disk = (time.perf_counter() - start) / 50 * 1000
+    start = time.perf_counter()
+    for _ in range(50):
+        CVParser().parse(pdf, 'cv.pdf')
+    in_memory = (time.perf_counter() - start) / 50 * 1000
+    print(f"  temp file : {via_disk:6.2f} ms per CV")
+    print(f"  in memory : {in_memory:6.2f} ms per CV")
+
+    for test in (test_bytes_streams_and_paths_parse_alike, test_wrong_or_unsupported_files_are_rejected_unparsed,
+                 test_reading_stops_at_the_page_budget_or_enough_signal, test_uploads_over_the_cap_are_refused):
+        test()
+        print(f"✓ {test.__name__}")
+
+    print("\n" + "=" * 80)
+    print(" " * 30 + "TEST COMPLETE!")
+    print("=" * 80)
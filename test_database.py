@@ -0,0 +1,887 @@
+"""
+Test script for the database layer (runs against a throwaway copy, never jobs.db)
+
+Usage:
+    python test_database.py          # prints a report
+    python -m pytest test_database.py
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import database as db
+import retention
+from db_writer import SearchWriter
+
+
+def use_temp_database():
+    """Point database.py at a fresh temporary file and initialize it."""
+    tmp_dir = tempfile.mkdtemp(prefix="neuronix_db_")
+    db.DATABASE_PATH = Path(tmp_dir) / "jobs.db"
+    db.init_database(backfill_in_background=False)
+    return db.DATABASE_PATH
+
+
+def make_jobs(count):
+    """Build matched-job dictionaries shaped like match_jobs() output."""
+    return [
+        {
+            'title': f'Python Developer {i}',
+            'company': f'Company {i % 50}',
+            'location': 'Remote',
+            'description': 'Build and maintain backend services in Python and Flask. ' * 5,
+            'skills': ['Python', 'Flask', 'SQL', 'Docker'],
+            'match_score': round(100 - (i % 100) * 0.5, 1),
+            'platform': 'RemoteOK',
+            'url': f'https://example.com/jobs/{i}'
+        }
+        for i in range(count)
+    ]
+
+
+# ============= WAL / CONCURRENCY =============
+
+def run_concurrent_writers(writers=8, searches_per_writer=25, jobs_per_search=20):
+    """Hammer save_search/save_job_results from several threads; return (errors, rows/sec)."""
+    jobs = make_jobs(jobs_per_search)
+    errors = []
+
+    def writer(worker_id):
+        for n in range(searches_per_writer):
+            try:
+                search_id = db.save_search(None, 'form', {'worker': worker_id, 'n': n}, 'python')
+                db.save_job_results(search_id, jobs)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    rows = writers * searches_per_writer * jobs_per_search
+    return errors, rows / elapsed
+
+
+def test_wal_mode_enabled():
+    use_temp_database()
+    conn = db.get_db_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+    conn.close()
+
+
+def test_concurrent_writers_do_not_lock():
+    use_temp_database()
+    errors, _ = run_concurrent_writers(writers=8, searches_per_writer=10)
+    assert errors == []
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0] == 80
+    assert conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] == 80 * 20
+    conn.close()
+
+
+def test_checkpoint_and_vacuum():
+    use_temp_database()
+    db.save_job_results(db.save_search(None, 'chat', {}, 'python'), make_jobs(5))
+    busy, _, _ = db.checkpoint('TRUNCATE')
+    assert busy == 0
+    db.vacuum()
+    assert len(db.get_search_results(1)) == 5
+
+
+# ============= BULK INSERT =============
+
+# job_results as it existed before postings/search_results were split out
+LEGACY_JOB_RESULTS_DDL = """
+CREATE TABLE IF NOT EXISTS job_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    search_id INTEGER,
+    job_title TEXT NOT NULL,
+    company TEXT,
+    location TEXT,
+    description TEXT,
+    skills TEXT,
+    match_score REAL,
+    platform TEXT,
+    url TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def insert_row_by_row(search_id, jobs):
+    """The original write path (one INSERT per job into job_results), kept as the benchmark baseline."""
+    conn = db.get_db_connection()
+    conn.execute(LEGACY_JOB_RESULTS_DDL)
+    for job in jobs:
+        conn.execute(
+            """INSERT INTO job_results 
+               (search_id, job_title, company, location, description, skills, match_score, platform, url)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (search_id, job.get('title'), job.get('company'), job.get('location'), job.get('description'),
+             json.dumps(job.get('skills', [])), job.get('match_score', 0), job.get('platform'), job.get('url'))
+        )
+    conn.commit()
+    conn.close()
+
+
+def benchmark_insert(insert_func, count):
+    """Time one call of insert_func for a search with ``count`` jobs."""
+    jobs = make_jobs(count)
+    search_id = db.save_search(None, 'form', {}, 'python')
+    start = time.perf_counter()
+    insert_func(search_id, jobs)
+    return time.perf_counter() - start
+
+
+def test_save_job_results_returns_ids_in_order():
+    use_temp_database()
+    search_id = db.save_search(None, 'form', {}, 'python')
+    jobs = make_jobs(30)
+    ids = db.save_job_results(search_id, jobs)
+
+    assert len(ids) == 30
+    results = {r['id']: r for r in db.get_search_results(search_id)}
+    for job_result_id, job in zip(ids, jobs):
+        assert results[job_result_id]['job_title'] == job['title']
+
+    assert db.save_job_results(search_id, []) == []
+
+
+# ============= NORMALIZED POSTINGS =============
+
+def test_repeated_postings_are_stored_once():
+    use_temp_database()
+    jobs = make_jobs(10)
+    for _ in range(3):
+        db.save_job_results(db.save_search(None, 'form', {}, 'python'), jobs)
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0] == 10
+    assert conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] == 30
+    conn.close()
+
+
+def test_canonical_url_ignores_tracking_and_fragments():
+    assert db.canonical_url('HTTPS://Example.com/jobs/1/?utm_source=x#apply') == 'https://example.com/jobs/1'
+    assert db.canonical_url('#') is None
+    assert db.posting_hash({'url': 'https://example.com/a?utm_medium=y'}) == \
+        db.posting_hash({'url': 'https://example.com/a/'})
+
+
+def test_results_and_saved_jobs_keep_their_shape():
+    use_temp_database()
+    user_id = db.create_user('shape@example.com', 'hash')
+    search_id = db.save_search(user_id, 'form', {}, 'python')
+    ids = db.save_job_results(search_id, make_jobs(3))
+    db.save_job(user_id, ids[0], 'apply soon')
+
+    expected = {'id', 'search_id', 'job_title', 'company', 'location', 'description',
+                'skills', 'match_score', 'platform', 'url', 'created_at'}
+    results = db.get_search_results(search_id)
+    assert set(results[0]) == expected
+    assert results[0]['skills'] == ['Python', 'Flask', 'SQL', 'Docker']
+
+    saved = db.get_saved_jobs(user_id)
+    assert set(saved[0]) == expected | {'saved_id', 'notes', 'saved_at'}
+    assert saved[0]['id'] == ids[0]
+
+
+def test_postings_are_stored_compactly_and_decoded_lazily():
+    use_temp_database()
+    search_id = db.save_search(None, 'form', {}, 'python')
+    db.save_job_results(search_id, make_jobs(3))
+
+    conn = db.get_db_connection()
+    types = conn.execute("SELECT DISTINCT typeof(skills), typeof(description) FROM postings").fetchall()
+    assert [tuple(t) for t in types] == [('blob', 'blob')]
+    assert conn.execute("SELECT COUNT(*) FROM skills").fetchone()[0] == 4
+    conn.close()
+
+    job = db.get_search_results(search_id)[0]
+    assert job['job_title'] and set(job._encoded) == {'skills', 'description'}  # nothing decoded yet
+    assert job['skills'] == ['Python', 'Flask', 'SQL', 'Docker']
+    assert set(job._encoded) == {'description'}
+    assert json.loads(json.dumps(job)) == dict(job)
+    assert job['description'].startswith('Build and maintain backend services')
+
+
+def test_field_projection_returns_only_requested_fields():
+    use_temp_database()
+    user_id = db.create_user('fields@example.com', 'hash')
+    search_id = db.save_search(user_id, 'form', {}, 'python')
+    ids = db.save_job_results(search_id, make_jobs(5))
+    for job_result_id in ids:
+        db.save_job(user_id, job_result_id)
+
+    results = db.get_search_results(search_id, db.JOB_LIST_FIELDS)
+    assert set(results[0]) == set(db.JOB_LIST_FIELDS) and 'description' not in results[0]
+
+    # Sort keys are fetched for the cursor but not returned
+    page, cursor = db.get_search_results_page(search_id, limit=2, fields=['job_title'])
+    assert [set(r) for r in page] == [{'job_title'}] * 2 and cursor
+    saved, pages = collect_pages(lambda c, n: db.get_saved_jobs_page(user_id, c, n, ['id']), 2)
+    assert sorted(j['id'] for j in saved) == ids and pages == 3
+
+    job = db.get_job_result(ids[0])
+    assert job['description'].startswith('Build and maintain backend services')
+    assert db.get_job_result(ids[-1] + 100) is None
+
+    # Projections of only the compactly stored columns still serialize
+    results = json.loads(json.dumps(db.get_search_results(search_id, ['description'])))
+    assert all(r['description'].startswith('Build and maintain') for r in results)
+    assert json.loads(json.dumps(db.get_job_result(ids[0], ['skills']))) == {'skills': ['Python', 'Flask', 'SQL', 'Docker']}
+    page, _ = db.get_search_results_page(search_id, limit=2, fields=['skills'])
+    assert json.loads(json.dumps(page)) == [{'skills': ['Python', 'Flask', 'SQL', 'Docker']}] * 2
+
+    try:
+        db.get_saved_jobs(user_id, ['id', 'password_hash'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown field was accepted")
+
+
+def test_legacy_text_postings_are_reencoded():
+    use_temp_database()
+    conn = db.get_db_connection()
+    conn.execute(
+        """INSERT INTO postings (content_hash, job_title, description, skills)
+           VALUES ('legacy', 'Data Engineer', 'Plain text description', '["SQL", "Airflow"]')"""
+    )
+    search_id = conn.execute("INSERT INTO searches (search_type) VALUES ('form')").lastrowid
+    conn.execute("INSERT INTO search_results (search_id, posting_id) VALUES (?, 1)", (search_id,))
+    conn.commit()
+    assert db.get_search_results(search_id)[0]['skills'] == ['SQL', 'Airflow']
+
+    conn.execute("BEGIN IMMEDIATE")
+    assert db.encode_postings_batch(conn, None, 100) == 1
+    assert db.encode_postings_batch(conn, 1, 100) is None
+    conn.commit()
+    assert tuple(conn.execute("SELECT typeof(skills), typeof(description) FROM postings").fetchone()) == \
+        ('blob', 'blob')
+    conn.close()
+
+    job = db.get_search_results(search_id)[0]
+    assert (job['skills'], job['description']) == (['SQL', 'Airflow'], 'Plain text description')
+
+
+def test_full_text_search_tracks_postings():
+    use_temp_database()
+    jobs = make_jobs(10)
+    jobs[3].update(title='Machine Learning Engineer', skills=['PyTorch', 'Kubernetes'])
+    search_id = db.save_search(None, 'form', {}, 'python')
+    db.save_job_results(search_id, jobs)
+
+    found = db.search_postings('pytorch engineers')
+    assert [j['title'] for j in found] == ['Machine Learning Engineer']
+    assert found[0]['skills'] == ['PyTorch', 'Kubernetes'] and found[0]['score'] > 0
+    assert len(db.search_postings('python', limit=5)) == 5
+    assert db.search_postings('python', location='Berlin') == []
+    assert db.search_postings('") OR *') == []
+
+    # Deleting postings (as retention does) removes them from the index
+    conn = db.get_db_connection()
+    conn.execute("DELETE FROM search_results")
+    conn.execute("DELETE FROM postings WHERE job_title = 'Machine Learning Engineer'")
+    conn.commit()
+    conn.execute("INSERT INTO postings_fts (postings_fts) VALUES ('integrity-check')")
+    conn.close()
+    assert db.search_postings('pytorch') == []
+
+
+def drop_postings_fts():
+    """Take the current database back to before migration 5 (postings_fts)."""
+    conn = db.get_db_connection()
+    conn.executescript("""
+        DROP TRIGGER postings_fts_insert; DROP TRIGGER postings_fts_delete; DROP TRIGGER postings_fts_update;
+        DROP TABLE postings_fts;
+        DELETE FROM schema_version WHERE version = 5; DELETE FROM migration_backfills WHERE version = 5;
+    """)
+    conn.close()
+
+
+def test_local_search_leaves_out_mock_jobs_before_the_limit():
+    use_temp_database()
+    jobs = make_jobs(5)
+    for job in jobs[:3]:
+        job.update(title='Python Python Developer', platform='Mock Data')
+    db.save_job_results(db.save_search(None, 'form', {}, 'python'), jobs)
+
+    found = db.search_local('python developer', limit=2)
+    assert len(found) == 2 and {j['platform'] for j in found} == {'RemoteOK'}
+    assert found[0]['source'] == 'local' and 'posted_date' in found[0] and 'created_at' not in found[0]
+
+
+def test_search_is_empty_until_the_full_text_index_exists():
+    use_temp_database()
+    db.save_job_results(db.save_search(None, 'form', {}, 'python'), make_jobs(3))
+    drop_postings_fts()
+    assert db.search_postings('python') == []
+
+
+def test_full_text_index_is_backfilled_in_batches():
+    use_temp_database()
+    jobs = make_jobs(10)
+    jobs[3].update(title='Machine Learning Engineer', skills=['PyTorch'])
+    jobs[5].update(title='Data Engineer', skills=['Spark'])
+    search_id = db.save_search(None, 'form', {}, 'python')
+    db.save_job_results(search_id, jobs)
+    drop_postings_fts()
+
+    conn = db.get_db_connection()
+    assert db.run_migrations(conn) == [5] and db.pending_backfills() == [5]
+    conn.close()
+
+    # Live writes to postings the backfill hasn't reached yet
+    db.save_job_results(db.save_search(None, 'form', {}, 'go'), [{**make_jobs(1)[0], 'title': 'Golang Engineer', 'url': 'https://example.com/go'}])
+    conn = db.get_db_connection()
+    conn.execute("DELETE FROM search_results WHERE posting_id IN (SELECT id FROM postings WHERE job_title = 'Data Engineer')")
+    conn.execute("DELETE FROM postings WHERE job_title = 'Data Engineer'")
+    conn.execute("UPDATE postings SET job_title = 'Deep Learning Engineer' WHERE job_title = 'Machine Learning Engineer'")
+    conn.commit()
+    conn.close()
+    assert [j['title'] for j in db.search_postings('engineer')] == ['Golang Engineer']
+
+    db.run_backfills(batch_size=3, pause=0)
+    assert db.pending_backfills() == []
+    assert sorted(j['title'] for j in db.search_postings('engineer')) == ['Deep Learning Engineer', 'Golang Engineer']
+    assert len(db.search_postings('python', limit=50)) == 10
+
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO postings_fts (postings_fts) VALUES ('integrity-check')")
+    triggers = [r[0] for r in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'postings_fts_%'")]
+    assert len(triggers) == 3 and not any('WHEN EXISTS' in sql for sql in triggers)
+    conn.close()
+
+
+def make_legacy_database(searches=2, jobs_per_search=5):
+    """Build a pre-normalization database by hand, with job result 7 bookmarked by user 1."""
+    tmp_dir = tempfile.mkdtemp(prefix="neuronix_db_")
+    db.DATABASE_PATH = Path(tmp_dir) / "jobs.db"
+
+    conn = db.get_db_connection()
+    conn.executescript(LEGACY_JOB_RESULTS_DDL + """;
+        CREATE INDEX idx_job_results_search ON job_results(search_id);
+        CREATE TABLE searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, search_type TEXT NOT NULL,
+            query_data TEXT, keywords TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE saved_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+            job_result_id INTEGER NOT NULL, notes TEXT, saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_result_id) REFERENCES job_results(id), UNIQUE(user_id, job_result_id)
+        );
+    """)
+    conn.commit()
+    conn.close()
+    for _ in range(searches):
+        insert_row_by_row(db.save_search(1, 'form', {}, 'python'), make_jobs(jobs_per_search))
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO saved_jobs (user_id, job_result_id) VALUES (1, 7)")
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_job_results_are_migrated():
+    make_legacy_database()
+    db.init_database(backfill_in_background=False)
+
+    conn = db.get_db_connection()
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    saved_jobs_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'saved_jobs'").fetchone()[0]
+    assert conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0] == 5
+    conn.close()
+
+    assert 'job_results' not in tables
+    assert 'search_results' in saved_jobs_sql
+    assert [r['id'] for r in db.get_search_results(2)] == [6, 7, 8, 9, 10]
+    assert db.get_saved_jobs(1)[0]['id'] == 7
+
+
+def test_interrupted_backfill_resumes_alongside_live_writes():
+    make_legacy_database(searches=3)
+
+    # Schema steps only: migration 2 waits behind the pending backfill
+    conn = db.get_db_connection()
+    conn.executescript((Path(db.__file__).parent / "schema.sql").read_text())
+    db.run_migrations(conn)
+    assert [r[0] for r in conn.execute("SELECT version FROM schema_version")] == [1]
+    conn.close()
+
+    # Live traffic keeps writing while the legacy rows are still uncopied
+    live_search = db.save_search(None, 'form', {}, 'python')
+    live_ids = db.save_job_results(live_search, make_jobs(2))
+    assert live_ids == [16, 17]
+
+    # Crash after two batches of four rows
+    version, name, step, backfill = db.MIGRATIONS[0]
+    calls = []
+
+    def crashing_copy(conn, cursor, batch_size):
+        calls.append(cursor)
+        if len(calls) > 2:
+            raise RuntimeError("worker killed")
+        return backfill.copy_batch(conn, cursor, batch_size)
+
+    db.MIGRATIONS[0] = (version, name, step, db.Backfill(crashing_copy, backfill.finalize))
+    try:
+        db.run_backfills(batch_size=4, pause=0)
+    except RuntimeError:
+        pass
+    finally:
+        db.MIGRATIONS[0] = (version, name, step, backfill)
+    assert db.pending_backfills() == [1]
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT cursor FROM migration_backfills").fetchone()[0] == '8'
+    conn.close()
+
+    db.run_backfills(batch_size=4, pause=0)
+    assert db.pending_backfills() == []
+    assert [r['id'] for r in db.get_search_results(3)] == [11, 12, 13, 14, 15]
+    assert [r['id'] for r in db.get_search_results(live_search)] == live_ids
+    assert db.get_saved_jobs(1)[0]['id'] == 7
+
+    conn = db.get_db_connection()
+    assert [r[0] for r in conn.execute("SELECT version FROM schema_version")] == [m[0] for m in db.MIGRATIONS]
+    conn.close()
+
+
+# ============= WRITE-BEHIND =============
+
+def test_search_writer_returns_ids_before_writing():
+    use_temp_database()
+    writer = SearchWriter(flush_interval=0.05)
+    search_id, job_result_ids = writer.submit(None, 'form', {'job_title': 'Python'}, 'python', make_jobs(4))
+    other_id, _ = writer.submit(None, 'chat', {'message': 'python'}, 'python', [])
+    writer.close()
+
+    assert other_id == search_id + 1
+    assert [r['id'] for r in db.get_search_results(search_id)] == job_result_ids
+    assert db.get_search_results(other_id) == []
+
+
+def test_reserved_ids_do_not_collide_with_direct_inserts():
+    use_temp_database()
+    reserved = db.reserve_ids('searches', 10)
+    direct_id = db.save_search(None, 'form', {}, 'python')
+    assert direct_id > reserved[-1]
+
+    writer = SearchWriter(flush_interval=0.01)
+    ids = [writer.submit(None, 'form', {}, 'python', make_jobs(2))[0] for _ in range(20)]
+    writer.close()
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0] == 21
+    assert conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] == 40
+    conn.close()
+    assert len(set(ids)) == 20 and direct_id not in ids
+
+
+# ============= PAGINATION =============
+
+def collect_pages(fetch_page, limit):
+    """Follow next_cursor until the last page; return (items, page count)."""
+    items, pages, cursor = [], 0, None
+    while True:
+        page, cursor = fetch_page(cursor, limit)
+        items.extend(page)
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+
+def test_keyset_pages_cover_every_row_once():
+    use_temp_database()
+    user_id = db.create_user('pages@example.com', 'hash')
+    search_ids = [db.save_search(user_id, 'form', {'n': n}, 'python') for n in range(23)]
+    job_result_ids = db.save_job_results(search_ids[0], make_jobs(45))
+    for job_result_id in job_result_ids[:12]:
+        db.save_job(user_id, job_result_id)
+
+    searches, pages = collect_pages(lambda c, n: db.get_user_searches_page(user_id, c, n), 10)
+    assert [s['id'] for s in searches] == sorted(search_ids, reverse=True) and pages == 3
+
+    results, pages = collect_pages(lambda c, n: db.get_search_results_page(search_ids[0], c, n), 20)
+    assert sorted(r['id'] for r in results) == job_result_ids and pages == 3
+    scores = [r['match_score'] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+    saved, pages = collect_pages(lambda c, n: db.get_saved_jobs_page(user_id, c, n), 5)
+    assert sorted(j['saved_id'] for j in saved) == list(range(1, 13)) and pages == 3
+
+
+def test_invalid_cursor_is_rejected():
+    use_temp_database()
+    for cursor in ('not-a-cursor', db.encode_cursor(1, 2, 3)):
+        try:
+            db.get_user_searches_page(1, cursor)
+        except ValueError:
+            continue
+        raise AssertionError(f"cursor {cursor!r} was accepted")
+
+
+# ============= RETENTION =============
+
+def age_rows(table, column, ids, days):
+    """Backdate rows so they fall outside a TTL."""
+    ids = list(ids)
+    backdated = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = db.get_db_connection()
+    conn.execute(
+        f"UPDATE {table} SET {column} = ? WHERE id IN ({', '.join('?' * len(ids))})",
+        (backdated, *ids)
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_retention_prunes_expired_rows_and_keeps_bookmarks():
+    use_temp_database()
+    archive_dir = tempfile.mkdtemp(prefix="neuronix_archive_")
+    user_id = db.create_user('keep@example.com', 'hash')
+
+    old_anonymous = [db.save_search(None, 'chat', {'n': n}, 'python') for n in range(7)]
+    result_ids = db.save_job_results(old_anonymous[0], make_jobs(5))
+    db.save_job(user_id, result_ids[0])
+    recent_anonymous = db.save_search(None, 'chat', {}, 'python')
+    old_user_search = db.save_search(user_id, 'form', {}, 'python')
+    age_rows('searches', 'created_at', old_anonymous + [old_user_search], 40)
+    age_rows('postings', 'created_at', range(1, 6), 1)
+
+    token = db.create_reset_token('keep@example.com')
+    conn = db.get_db_connection()
+    conn.execute("UPDATE password_reset_tokens SET expires_at = '2000-01-01 00:00:00'")
+    conn.commit()
+    conn.close()
+
+    report = retention.run_retention(
+        ttl_days={'orphan_postings': 0}, batch_size=3, pause=0, archive_dir=archive_dir)
+
+    assert report['anonymous_searches'] == 7
+    assert report['password_reset_tokens'] == 1
+    assert report['orphan_postings'] == 4  # the bookmarked result keeps its posting
+    assert 'user_searches' not in report  # no TTL by default
+    assert db.verify_reset_token(token) is None
+    assert [s['id'] for s in db.get_user_searches(user_id)] == [old_user_search]
+    assert [j['id'] for j in db.get_saved_jobs(user_id)] == [result_ids[0]]
+
+    conn = db.get_db_connection()
+    assert [r[0] for r in conn.execute("SELECT id FROM searches WHERE user_id IS NULL")] == [recent_anonymous]
+    conn.close()
+
+    archived = []
+    for path in Path(archive_dir).glob("anonymous_searches-*.jsonl.gz"):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            archived.extend(json.loads(line) for line in f)
+    assert sorted(s['id'] for s in archived) == old_anonymous
+    assert len(next(s for s in archived if s['id'] == old_anonymous[0])['results']) == 5
+
+    conn = db.get_db_connection()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+    conn.close()
+
+
+def test_retention_counts_and_archives_only_rows_it_deletes():
+    use_temp_database()
+    archive_dir = tempfile.mkdtemp(prefix="neuronix_archive_")
+    searches = [db.save_search(None, 'chat', {}, 'python') for _ in range(3)]
+    age_rows('searches', 'created_at', searches, 40)
+
+    # A search is refreshed after the batch was selected, before the delete runs
+    select, delete, clock = retention.POLICIES['anonymous_searches']
+    def select_then_refresh(conn, after_id, cutoff, limit):
+        rows = select(conn, after_id, cutoff, limit)
+        conn.execute("UPDATE searches SET created_at = CURRENT_TIMESTAMP WHERE id = ?", (searches[1],))
+        conn.commit()
+        return rows
+    retention.POLICIES['anonymous_searches'] = (select_then_refresh, delete, clock)
+    try:
+        deleted = retention.prune('anonymous_searches', 30, pause=0, archive_dir=archive_dir)
+    finally:
+        retention.POLICIES['anonymous_searches'] = (select, delete, clock)
+
+    assert deleted == 2
+    archived = []
+    for path in Path(archive_dir).glob("anonymous_searches-*.jsonl.gz"):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            archived.extend(json.loads(line)['id'] for line in f)
+    assert sorted(archived) == [searches[0], searches[2]]
+
+
+# ============= STORAGE BACKENDS =============
+# The same scenario runs on SQLite and PostgreSQL. PostgreSQL comes from
+# TEST_DATABASE_URL, or an embedded server if pgserver is installed; otherwise
+# that half is skipped.
+
+_postgres = {}
+
+
+def postgres_url():
+    """URL of a PostgreSQL server for tests, or None if there is none."""
+    if 'url' not in _postgres:
+        url = os.getenv('TEST_DATABASE_URL')
+        if not url:
+            try:
+                import pgserver
+                server = pgserver.get_server(tempfile.mkdtemp(prefix="neuronix_pg_"), cleanup_mode='stop')
+                _postgres['server'] = server  # Keeps the server running
+                url = server.get_uri()
+            except Exception as e:
+                print(f"⚠ PostgreSQL unavailable, skipping backend comparison: {e}")
+                url = None
+        _postgres['url'] = url
+    return _postgres['url']
+
+
+def use_postgres_database(url):
+    """Point database.py at a fresh PostgreSQL database and initialize it."""
+    import psycopg
+    name = f"neuronix_test_{os.getpid()}_{int(time.time() * 1000)}"
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute(f'CREATE DATABASE "{name}"')
+    base, _, query = url.partition('?')
+    db.DATABASE_URL = f"{base.rsplit('/', 1)[0]}/{name}" + (f"?{query}" if query else "")
+    db.init_database(backfill_in_background=False)
+
+
+def exercise_backend():
+    """Run the request paths end to end; return a summary that must not depend on the backend."""
+    summary = {}
+    user_id = db.create_user('backend@example.com', 'hash', 'Backend Test')
+    other_id = db.create_user('other@example.com', 'hash')
+    summary['duplicate_user'] = db.create_user('backend@example.com', 'hash')
+    summary['duplicate_email_update'] = db.update_user_profile(other_id, email='backend@example.com')
+    db.update_user_profile(user_id, full_name='Renamed')
+    db.update_last_login(user_id)
+    summary['user'] = {k: db.get_user_by_email('backend@example.com')[k] for k in ('id', 'full_name')}
+    summary['contact'] = db.save_contact_submission('Ana', 'ana@example.com', 'Hi', 'Hello')
+
+    jobs = make_jobs(30)
+    jobs[7].update(title='Data Engineer', location='Berlin', skills=['Spark', 'Airflow'])
+    search_ids = [db.save_search(user_id, 'form', {'n': n}, 'python') for n in range(12)]
+    job_result_ids = db.save_job_results(search_ids[0], jobs)
+    db.save_job_results(search_ids[1], jobs[:5])  # Same postings, new results
+    results = db.get_search_results(search_ids[0])
+    summary['results'] = [(r['job_title'], r['company'], r['skills'], r['match_score']) for r in results]
+
+    searches, pages = collect_pages(lambda c, n: db.get_user_searches_page(user_id, c, n), 5)
+    summary['search_pages'] = ([s['id'] for s in searches] == sorted(search_ids, reverse=True), pages)
+    page_results, pages = collect_pages(lambda c, n: db.get_search_results_page(search_ids[0], c, n), 8)
+    summary['result_pages'] = (sorted(r['id'] for r in page_results) == job_result_ids, pages)
+
+    saved_ids = [db.save_job(user_id, job_result_id) for job_result_id in job_result_ids[:6]]
+    summary['duplicate_save'] = db.save_job(user_id, job_result_ids[0])
+    db.unsave_job(user_id, saved_ids[0])
+    saved, pages = collect_pages(lambda c, n: db.get_saved_jobs_page(user_id, c, n), 2)
+    summary['saved'] = (sorted(j['id'] for j in saved) == job_result_ids[1:6], pages)
+    saved, pages = collect_pages(lambda c, n: db.get_saved_jobs_page(user_id, c, n, db.JOB_LIST_FIELDS), 2)
+    summary['saved_list_view'] = (sorted(set(j) for j in saved) == [set(db.JOB_LIST_FIELDS)] * 5, pages)
+    summary['job_detail'] = dict(db.get_job_result(job_result_ids[7], ['job_title', 'location', 'skills']))
+
+    search_id = db.reserve_ids('searches', 1)[0]
+    result_ids = db.reserve_ids('search_results', 3)
+    db.save_search_batch([{
+        'search_id': search_id, 'user_id': None, 'search_type': 'chat', 'query_data': {},
+        'keywords': 'python', 'jobs': make_jobs(3), 'job_result_ids': result_ids,
+    }])
+    summary['batch'] = [r['id'] for r in db.get_search_results(search_id)] == result_ids
+    summary['batch_after_direct'] = db.save_search(None, 'form', {}, 'python') > search_id
+
+    summary['search'] = [j['title'] for j in db.search_postings('spark engineer')]
+    summary['search_location'] = len(db.search_postings('python', location='remote', limit=50))
+    age_rows('postings', 'created_at', [db.search_postings('spark')[0]['posting_id']], 10)
+    summary['search_too_old'] = db.search_postings('spark', max_age_days=5)
+    summary['search_injection'] = db.search_postings('") OR *')
+
+    token = db.create_reset_token('backend@example.com')
+    summary['token'] = db.verify_reset_token(token) == user_id
+    db.mark_token_used(token)
+    summary['token_used'] = db.verify_reset_token(token)
+    return summary
+
+
+def test_postgres_backend_matches_sqlite():
+    use_temp_database()
+    expected = exercise_backend()
+    assert expected['search'] == ['Data Engineer'] and expected['duplicate_user'] is None
+
+    url = postgres_url()
+    if url is None:
+        return
+    try:
+        use_postgres_database(url)
+        assert db.get_backend().name == 'postgres'
+        assert exercise_backend() == expected
+    finally:
+        db.get_backend().close()
+        db.DATABASE_URL = ''
+
+
+# ============= QUERY PLANS =============
+
+# Tiny bookkeeping tables that are fine to scan; postings_fts scans are FTS5 index lookups
+SCAN_ALLOWED = ('sqlite_sequence', 'sqlite_master', 'schema_version', 'migration_backfills', 'CONSTANT ROW',
+                'postings_fts')
+
+
+def capture_statements(action):
+    """Run action() and return every SELECT/UPDATE/DELETE database.py executed, values bound."""
+    statements = []
+    connect = db.get_db_connection
+
+    def traced_connection():
+        conn = connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    db.get_db_connection = traced_connection
+    try:
+        action()
+    finally:
+        db.get_db_connection = connect
+    return [s for s in statements if s.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))]
+
+
+def query_plan(sql):
+    conn = db.get_db_connection()
+    plan = [row['detail'] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    conn.close()
+    return plan
+
+
+def plan_problems(plan):
+    """Plan steps that fall back to a full scan or a temp B-tree sort."""
+    return [
+        step for step in plan
+        if 'TEMP B-TREE' in step
+        or (step.startswith('SCAN') and not any(name in step for name in SCAN_ALLOWED))
+    ]
+
+
+def exercise_database():
+    """Call every query path in database.py against a populated database."""
+    user_id = db.create_user('plans@example.com', 'hash', 'Plan Tester')
+    db.get_user_by_email('plans@example.com')
+    db.get_user_by_id(user_id)
+    db.update_last_login(user_id)
+    db.update_user_profile(user_id, 'Plan T', 'plans2@example.com')
+    db.update_user_password(user_id, 'hash2')
+    db.update_profile_photo(user_id, '/uploads/profiles/x.png')
+    db.save_contact_submission('A', 'a@example.com', 'Hi', 'Hello')
+
+    search_id = db.save_search(user_id, 'form', {}, 'python')
+    ids = db.save_job_results(search_id, make_jobs(30))
+    db.save_search_batch([{
+        'search_id': db.reserve_ids('searches', 1)[0], 'user_id': user_id, 'search_type': 'chat',
+        'query_data': {}, 'keywords': 'python', 'jobs': make_jobs(3),
+        'job_result_ids': db.reserve_ids('search_results', 3)
+    }])
+    saved_id = db.save_job(user_id, ids[0])
+    db.save_job(user_id, ids[1])
+
+    db.get_user_searches(user_id)
+    _, cursor = db.get_user_searches_page(user_id, limit=1)
+    db.get_user_searches_page(user_id, cursor, 1)
+    db.get_search_results(search_id)
+    _, cursor = db.get_search_results_page(search_id, limit=5)
+    db.get_search_results_page(search_id, cursor, 5)
+    db.get_saved_jobs(user_id)
+    _, cursor = db.get_saved_jobs_page(user_id, limit=1)
+    db.get_saved_jobs_page(user_id, cursor, 1)
+    db.get_job_result(ids[0])
+    db.unsave_job(user_id, saved_id)
+    db.search_postings('python backend', location='remote', max_age_days=7)
+
+    token = db.create_reset_token('plans2@example.com')
+    db.verify_reset_token(token)
+    db.mark_token_used(token)
+
+
+def test_hot_queries_avoid_scans_and_temp_sorts():
+    use_temp_database()
+    statements = capture_statements(exercise_database)
+    assert len(statements) > 20
+
+    failures = {sql: plan_problems(query_plan(sql)) for sql in statements}
+    failures = {sql: problems for sql, problems in failures.items() if problems}
+    assert not failures, "\n\n".join(f"{sql}\n  -> {problems}" for sql, problems in failures.items())
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure_persist_latency(persist, requests=200):
+    """Per-request latency (ms) of a persistence callable, as the endpoint would see it."""
+    jobs = make_jobs(20)
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        persist(jobs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" " * 22 + "NEURONIX AI JOBFLOW - DATABASE TEST")
+    print("=" * 80)
+
+    print("\nWRITE THROUGHPUT WITH N CONCURRENT WRITERS:")
+    print("-" * 80)
+    for writers in (1, 2, 4, 8, 16):
+        use_temp_database()
+        errors, throughput = run_concurrent_writers(writers=writers)
+        print(f"  {writers:>2} writers: {throughput:>10,.0f} rows/sec  ({len(errors)} errors)")
+
+    print("\nSAVE_JOB_RESULTS: ROW-BY-ROW VS EXECUTEMANY (NEW / ALREADY-STORED POSTINGS):")
+    print("-" * 80)
+    for count in (20, 500, 10_000):
+        use_temp_database()
+        baseline = benchmark_insert(insert_row_by_row, count)
+        bulk_new = benchmark_insert(db.save_job_results, count)
+        bulk_repeat = benchmark_insert(db.save_job_results, count)
+        print(f"  {count:>6} rows: row-by-row {baseline * 1000:>8.1f} ms | "
+              f"executemany {bulk_new * 1000:>8.1f} ms / {bulk_repeat * 1000:>8.1f} ms")
+
+    print("\nPERSISTENCE LATENCY PER RECOMMENDATION REQUEST (20 JOBS):")
+    print("-" * 80)
+    use_temp_database()
+    sync = measure_persist_latency(
+        lambda jobs: db.save_job_results(db.save_search(None, 'form', {}, 'python'), jobs))
+    writer = SearchWriter()
+    behind = measure_persist_latency(lambda jobs: writer.submit(None, 'form', {}, 'python', jobs))
+    writer.close()
+    print(f"  synchronous : p50 {percentile(sync, 50):6.2f} ms | p99 {percentile(sync, 99):6.2f} ms")
+    print(f"  write-behind: p50 {percentile(behind, 50):6.2f} ms | p99 {percentile(behind, 99):6.2f} ms")
+
+    print("\nSEARCH RESULTS PAYLOAD: EVERY FIELD VS LIST VIEW (100 JOBS):")
+    print("-" * 80)
+    use_temp_database()
+    search_id = db.save_search(None, 'form', {}, 'python')
+    db.save_job_results(search_id, make_jobs(100))
+    for label, fields in (('every field', None), ('list view', db.JOB_LIST_FIELDS)):
+        start = time.perf_counter()
+        for _ in range(50):
+            payload = json.dumps(db.get_search_results(search_id, fields), default=str)
+        elapsed = (time.perf_counter() - start) / 50 * 1000
+        print(f"  {label:<12}: {len(payload):>8,} bytes | {elapsed:6.2f} ms to query and serialize")
+
+    print("\n" + "=" * 80)
+    print(" " * 30 + "TEST COMPLETE!")
+    print("=" * 80)
@@ -0,0 +1,101 @@
+"""
+Test script for batch matching (match_profiles) against match_jobs
+
+Usage:
+    python test_matcher.py       # prints a report
+    python -m pytest test_matcher.py
+"""
+
+import random
+import time
+
+from matcher_enhanced import EnhancedJobMatcher, match_jobs, match_profiles
+
+SKILLS = ['Python', 'python ', 'Django', 'Flask', 'React', 'React Native', 'JS', 'JavaScript', 'Node',
+          'SQL', 'PostgreSQL', 'MongoDB', 'AWS', 'GCP', 'Docker', 'Kubernetes', 'CI/CD', 'ML', 'AI',
+          'Deep Learning', 'Go', 'Rust', 'Java', 'C++', 'Excel', '']
+DESCRIPTIONS = ['Junior role for a graduate', 'Senior engineer, 5+ years', 'Staff architect',
+                'Mid level, 3-5 years', '']
+
+
+def make_pool(profiles=25, jobs=30, seed=7):
+    """Profiles and jobs drawn from overlapping, partly synonymous skill lists."""
+    rng = random.Random(seed)
+    profile_list = [
+        {'job_title': rng.choice(['Python Developer', 'Data Engineer', '']),
+         'skills': rng.sample(SKILLS, rng.randint(0, 6)),
+         'experience': rng.choice([0, 3, '6 years', 12])}
+        for _ in range(profiles)
+    ]
+    profile_list.append({'job_title': 'Developer', 'skills': 'Go, Rust , SQL', 'experience': 1})
+    job_list = [
+        {'id': j, 'title': rng.choice(['Python Developer', 'Backend Engineer', 'Data Engineer']),
+         'company': f'Company {j}', 'description': rng.choice(DESCRIPTIONS),
+         'skills': rng.sample(SKILLS, rng.randint(0, 7))}
+        for j in range(jobs)
+    ]
+    return profile_list, job_list
+
+
+def test_batch_skill_and_experience_scores_match_single_profile_scores():
+    profiles, jobs = make_pool()
+    for profile, ranked in zip(profiles, match_profiles(profiles, jobs)):
+        expected = {job['id']: job for job in match_jobs(profile, jobs)}
+        assert len(ranked) == len(jobs)
+        for job in ranked:
+            assert job['skill_match'] == expected[job['id']]['skill_match'], (profile, job['skills'])
+            assert job['experience_match'] == expected[job['id']]['experience_match']
+            assert sorted(job['matched_skills']) == sorted(expected[job['id']]['matched_skills'])
+
+
+def test_batch_skill_scores_are_exact():
+    matcher = EnhancedJobMatcher()
+    profiles, jobs = make_pool(profiles=10, jobs=20, seed=3)
+    users = [matcher.profile_features(p) for p in profiles]
+    job_skills = [skills for _, skills in (matcher.job_features(job) for job in jobs)]
+    for user, ranked in zip(users, matcher.match_profiles(profiles, jobs)):
+        for job in ranked:
+            score = matcher.calculate_skill_match_score(user['skills'], job_skills[job['id']])
+            assert job['skill_match'] == round(score, 1)
+
+
+def test_batch_handles_pools_without_skills():
+    profiles = [{'job_title': 'Chef', 'skills': []}, {'skills': ['Python']}]
+    jobs = [{'id': 1, 'title': 'Chef', 'description': 'Cooking', 'skills': []}]
+    assert [[job['skill_match'] for job in ranked] for ranked in match_profiles(profiles, jobs)] == [[0.0], [0.0]]
+    assert list(match_profiles(profiles, [])) == [[], []]
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" " * 22 + "NEURONIX AI JOBFLOW - MATCHER TEST")
+    print("=" * 80)
+
+    print("\nSKILL SCORES, 200 PROFILES x 300 JOBS:")
+    print("-" * 80)
+    matcher = EnhancedJobMatcher()
+    profiles, jobs = make_pool(profiles=200, jobs=300)
+    users = [matcher.profile_features(p) for p in profiles]
+    job_skills = [skills for _, skills in (matcher.job_features(job) for job in jobs)]
+
+    start = time.perf_counter()
+    for user in users:
+        for skills in job_skills:
+            matcher.calculate_skill_match_score(user['skills'], skills)
+    per_pair = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in matcher.match_profiles(profiles, jobs, top_n=20):
+        pass
+    batch = time.perf_counter() - start
+    print(f"  per-pair skill loop (skills only)  : {per_pair * 1000:8.1f} ms")
+    print(f"  match_profiles, every score, top 20: {batch * 1000:8.1f} ms")
+
+    for test in (test_batch_skill_and_experience_scores_match_single_profile_scores,
+                 test_batch_skill_scores_are_exact, test_batch_handles_pools_without_skills):
+        test()
+        print(f"✓ {test.__name__}")
+
+    print("\n" + "=" * 80)
+    print(" " * 30 + "TEST COMPLETE!")
+    print("=" * 80)
@@ -0,0 +1,60 @@
+"""
+Test script for the job result endpoints' ?fields= projections
+
+Usage:
+    python test_server.py       # prints a report
+    python -m pytest test_server.py
+"""
+
+import database as db
+from test_database import make_jobs, use_temp_database
+
+# server initializes the database it is imported with; never the real jobs.db
+use_temp_database()
+import server
+
+# As in production: compact JSON, which goes through the C encoder (FLASK_DEBUG pretty-prints in Python)
+server.app.debug = False
+client = server.app.test_client()
+
+
+def make_search(count=3):
+    use_temp_database()
+    search_id = db.save_search(None, 'form', {}, 'python')
+    return search_id, db.save_job_results(search_id, make_jobs(count))
+
+
+def test_job_projection_of_encoded_fields_has_data():
+    _, ids = make_search()
+    response = client.get(f'/api/jobs/{ids[0]}?fields=description')
+    assert response.status_code == 200
+    assert response.json['job']['description'].startswith('Build and maintain backend services')
+
+    job = client.get(f'/api/jobs/{ids[0]}?fields=skills,description').json['job']
+    assert job['skills'] == ['Python', 'Flask', 'SQL', 'Docker'] and job['description']
+
+
+def test_search_results_projection_of_encoded_fields_has_data():
+    search_id, _ = make_search()
+    response = client.get(f'/api/search/{search_id}/results?fields=skills')
+    assert response.status_code == 200
+    assert response.json['jobs'] == [{'skills': ['Python', 'Flask', 'SQL', 'Docker']}] * 3
+
+    # Paged, with the hidden sort keys removed again
+    page = client.get(f'/api/search/{search_id}/results?fields=skills&limit=2').json
+    assert page['jobs'] == [{'skills': ['Python', 'Flask', 'SQL', 'Docker']}] * 2 and page['next_cursor']
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" " * 24 + "NEURONIX AI JOBFLOW - SERVER TEST")
+    print("=" * 80)
+
+    for test in (test_job_projection_of_encoded_fields_has_data,
+                 test_search_results_projection_of_encoded_fields_has_data):
+        test()
+        print(f"✓ {test.__name__}")
+
+    print("\n" + "=" * 80)
+    print(" " * 30 + "TEST COMPLETE!")
+    print("=" * 80)
@@ -0,0 +1,106 @@
+"""
+Test script for session tokens and the user cache
+
+Usage:
+    python test_sessions.py       # prints a report
+    python -m pytest test_sessions.py
+"""
+
+import time
+
+import database as db
+import sessions
+from test_database import use_temp_database
+
+
+def make_user(email='session@example.com'):
+    use_temp_database()
+    sessions.user_cache.clear()
+    user_id = db.create_user(email, 'hash', 'Session Test')
+    return db.get_user_by_id(user_id)
+
+
+def test_tokens_authenticate_their_user():
+    user = make_user()
+    token = sessions.issue_token(user)
+    assert sessions.authenticate(token)['email'] == 'session@example.com'
+    assert sessions.bearer_token(f"Bearer {token}") == token
+    assert sessions.bearer_token(f"Basic {token}") is None
+
+    payload, signature = token.split('.')
+    forged = sessions._b64encode(sessions._b64decode(payload).replace(b'[1,', b'[2,'))
+    for bad in (None, '', 'garbage', f"{forged}.{signature}", f"{payload}.{signature[:-2]}"):
+        assert sessions.authenticate(bad) is None
+    assert sessions.authenticate(sessions.issue_token(user, max_age=-1)) is None
+
+
+def test_password_change_ends_sessions():
+    user = make_user()
+    token = sessions.issue_token(user)
+    db.update_user_password(user['id'], 'new-hash')
+    assert sessions.authenticate(token) is None
+    assert sessions.authenticate(sessions.issue_token(db.get_user_by_id(user['id']))) is not None
+
+
+def test_cache_serves_users_and_drops_changed_ones():
+    user = make_user()
+    token = sessions.issue_token(user)
+    cache = sessions.user_cache
+    sessions.authenticate(token)
+    misses = cache.misses
+    for _ in range(5):
+        sessions.authenticate(token)
+    assert cache.misses == misses and cache.hits >= 5
+
+    db.update_user_profile(user['id'], full_name='Renamed')
+    assert sessions.authenticate(token)['full_name'] == 'Renamed'
+    db.update_profile_photo(user['id'], '/uploads/profiles/new.png')
+    assert sessions.authenticate(token)['profile_photo'] == '/uploads/profiles/new.png'
+
+    # Callers get copies, so they can't change the cached row
+    sessions.authenticate(token).pop('password_hash')
+    assert 'password_hash' in sessions.authenticate(token)
+
+
+def test_cache_evicts_least_recently_used_and_expires():
+    cache = sessions.UserCache(lambda user_id: {'id': user_id}, max_size=2, ttl=0.05)
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)  # Evicts 2
+    assert list(cache._users) == [1, 3]
+
+    misses = cache.misses
+    time.sleep(0.06)
+    cache.get(1)
+    assert cache.misses == misses + 1
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" " * 20 + "NEURONIX AI JOBFLOW - SESSIONS TEST")
+    print("=" * 80)
+
+    print("\nLOOKING UP THE USER FOR 2,000 AUTHENTICATED REQUESTS:")
+    print("-" * 80)
+    user = make_user()
+    token = sessions.issue_token(user)
+    start = time.perf_counter()
+    for _ in range(2000):
+        db.get_user_by_id(user['id'])
+    uncached = (time.perf_counter() - start) / 2000 * 1000
+    start = time.perf_counter()
+    for _ in range(2000):
+        sessions.authenticate(token)
+    cached = (time.perf_counter() - start) / 2000 * 1000
+    print(f"  database query     : {uncached:6.3f} ms per request")
+    print(f"  token + user cache : {cached:6.3f} ms per request")
+
+    for test in (test_tokens_authenticate_their_user, test_password_change_ends_sessions,
+                 test_cache_serves_users_and_drops_changed_ones, test_cache_evicts_least_recently_used_and_expires):
+        test()
+        print(f"✓ {test.__name__}")
+
+    print("\n" + "=" * 80)
+    print(" " * 30 + "TEST COMPLETE!")
+    print("=" * 80)
@@ -0,0 +1,99 @@
+"""
+Test script for request tracing and the latency histograms
+
+Usage:
+    python test_tracing.py       # prints a report
+    python -m pytest test_tracing.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+def test_spans_nest_under_the_request():
+    root = tracing.start_trace('GET /test')
+    with tracing.span('outer', board='remoteok'):
+        with tracing.span('inner'):
+            pass
+    tracing.finish_trace(root, 'GET', '/test', 200)
+
+    assert [child.name for child in root.children] == ['outer']
+    assert root.children[0].attrs == {'board': 'remoteok'}
+    assert [child.name for child in root.children[0].children] == ['inner']
+    assert root.duration >= root.children[0].duration
+    assert 'board=remoteok' in tracing.format_tree(root)
+
+    # Outside a request, spans still count but join no tree
+    with tracing.span('orphan') as orphan:
+        pass
+    assert orphan not in root.children
+
+
+def test_pool_threads_join_the_trace():
+    root = tracing.start_trace('GET /pool')
+
+    @tracing.traced('pool.work')
+    def work():
+        return 1
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = [pool.submit(tracing.in_current_trace(work)).result() for _ in range(3)]
+    tracing.finish_trace(root, 'GET', '/pool', 200)
+
+    assert results == [1, 1, 1]
+    assert [child.name for child in root.children] == ['pool.work'] * 3
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = tracing.Histogram('test_seconds', 'Test', ['route'], buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 5):
+        histogram.observe(seconds, '/a')
+    text = histogram.render()
+
+    assert 'test_seconds_bucket{route="/a",le="0.01"} 1' in text
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 3' in text
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'test_seconds_count{route="/a"} 4' in text
+    assert histogram.snapshot()[('/a',)][0] == 4
+
+
+def test_instrument_wraps_only_database_calls():
+    namespace = {'__name__': 'fake_db', 'get_db_connection': None}
+    exec("def get_user(): return get_db_connection\n"
+         "def helper(): return 1\n"
+         "def _private(): return get_db_connection\n", namespace)
+    helper, private = namespace['helper'], namespace['_private']
+    tracing.instrument(namespace, 'fake', uses='get_db_connection')
+
+    assert namespace['helper'] is helper and namespace['_private'] is private
+    before = tracing.SPAN_SECONDS.snapshot().get(('fake.get_user',), (0, 0))[0]
+    namespace['get_user']()
+    assert tracing.SPAN_SECONDS.snapshot()[('fake.get_user',)][0] == before + 1
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" " * 20 + "NEURONIX AI JOBFLOW - TRACING TEST")
+    print("=" * 80)
+
+    print("\nCOST OF A SPAN:")
+    print("-" * 80)
+    root = tracing.start_trace('benchmark')
+    start = time.perf_counter()
+    for _ in range(100000):
+        with tracing.span('benchmark.span'):
+            pass
+    per_span = (time.perf_counter() - start) / 100000 * 1e6
+    tracing.finish_trace(root, 'GET', '/benchmark', 200)
+    print(f"  {per_span:.2f} µs per span")
+
+    for test in (test_spans_nest_under_the_request, test_pool_threads_join_the_trace,
+                 test_histogram_buckets_are_cumulative, test_instrument_wraps_only_database_calls):
+        test()
+        print(f"✓ {test.__name__}")
+
+    print("\n" + "=" * 80)
+    print(" " * 30 + "TEST COMPLETE!")
+    print("=" * 80)
@@ -0,0 +1,191 @@
+"""
+Request tracing and latency histograms.
+
+Each request gets a trace: a tree of timed spans. Spans cover scraping each
+board, each matcher stage, each database.py call, response serialization
+and compression. Every span's duration feeds a histogram for its name, and
+every request's duration feeds one for its route. The /metrics endpoint
+serves both in the Prometheus text format. A request slower than
+TRACE_SLOW_REQUEST_MS has its span tree logged as a warning.
+
+Spans outside a request still feed the histograms, but belong to no tree.
+That covers the write-behind flusher, retention and scripts.
+"""
+
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Log the span tree of requests slower than this (0 = never)
+SLOW_REQUEST_MS = float(os.getenv('TRACE_SLOW_REQUEST_MS', '0'))
+
+# Seconds; the same bounds for every histogram so series can be compared
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+log = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('trace_span', default=None)
+
+
+class Histogram:
+    """Durations in seconds, bucketed Prometheus-style; one series per combination of label values."""
+
+    def __init__(self, name, description, label_names, buckets=BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def snapshot(self):
+        """{labels: (count, sum)} for every series."""
+        with self._lock:
+            return {labels: (sum(counts), total) for labels, (counts, total) in self._series.items()}
+
+    def render(self):
+        """The histogram in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total in series:
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+SPAN_SECONDS = Histogram('neuronix_span_duration_seconds', 'Time spent in each traced stage', ['span'])
+REQUEST_SECONDS = Histogram('neuronix_request_duration_seconds', 'Time to build each response',
+                            ['method', 'route', 'status'])
+
+
+class Span:
+    """One timed stage; ``children`` are the spans started inside it."""
+
+    __slots__ = ('name', 'attrs', 'start', 'duration', 'children')
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.duration = None  # Seconds, once finished
+        self.children = []
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block as a span of the current trace (if any) and record it in the histogram."""
+    parent = _current.get()
+    node = Span(name, attrs)
+    if parent is not None:
+        parent.children.append(node)
+    token = _current.set(node)
+    try:
+        yield node
+    finally:
+        node.duration = time.perf_counter() - node.start
+        _current.reset(token)
+        SPAN_SECONDS.observe(node.duration, name)
+
+
+def traced(name):
+    """Decorator: run every call of the function in a span called ``name``."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument(namespace, prefix, uses):
+    """
+    Wrap a module's public functions that call ``uses`` in spans named prefix.function.
+
+    Args:
+        namespace: the module's globals()
+        prefix: span name prefix (e.g. 'db')
+        uses: only functions whose code refers to this global are wrapped
+              (for database.py, get_db_connection: every call that hits the database)
+    """
+    module = namespace['__name__']
+    for name, func in list(namespace.items()):
+        if (not name.startswith('_') and callable(func) and getattr(func, '__module__', None) == module
+                and uses in getattr(getattr(func, '__code__', None), 'co_names', ())):
+            namespace[name] = traced(f"{prefix}.{name}")(func)
+
+
+def in_current_trace(func):
+    """Bind ``func`` to the current trace, so spans it starts on another thread (e.g. a pool) join this one."""
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+
+def start_trace(name):
+    """Begin the root span of a request on this thread; returns it."""
+    root = Span(name)
+    _current.set(root)
+    return root
+
+
+def finish_trace(root, method, route, status):
+    """End a request's trace, record its duration and log its span tree if it was slow."""
+    root.duration = time.perf_counter() - root.start
+    _current.set(None)
+    REQUEST_SECONDS.observe(root.duration, method, route, str(status))
+    if SLOW_REQUEST_MS and root.duration * 1000 >= SLOW_REQUEST_MS:
+        log.warning("⚠ Slow request: %s %s in %.0f ms\n%s", root.name, status, root.duration * 1000, format_tree(root),
+                    extra={'route': route, 'status': status, 'duration_ms': round(root.duration * 1000, 1)})
+
+
+def format_tree(root, indent=1):
+    """The span tree as indented lines: duration, name and attributes."""
+    duration = 'running' if root.duration is None else f"{root.duration * 1000:.1f} ms"
+    attrs = " ".join(f"{k}={v}" for k, v in root.attrs.items())
+    lines = [f"{'  ' * indent}{duration:>12}  {root.name} {attrs}".rstrip()]
+    for child in list(root.children):
+        lines.append(format_tree(child, indent + 1))
+    return "\n".join(lines)
+
+
+def render_gauge(name, description, value):
+    return f"# HELP {name} {description}\n# TYPE {name} gauge\n{name} {value}"
+
+
+def render_metrics(gauges=(), extra=()):
+    """Every histogram, plus (name, description, value) gauges and other rendered metrics, as a Prometheus scrape body."""
+    parts = [SPAN_SECONDS.render(), REQUEST_SECONDS.render()]
+    parts.extend(render_gauge(*gauge) for gauge in gauges)
+    parts.extend(extra)
+    return "\n".join(parts) + "\n"
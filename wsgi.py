@@ -0,0 +1,123 @@
+"""
+Production entry point for the Neuronix AI JobFlow server.
+
+    python wsgi.py
+
+Runs gunicorn (Linux/macOS): WEB_WORKERS processes with WEB_THREADS threads
+each. On Windows, or with WEB_SERVER=waitress, it runs waitress: one process
+with WEB_THREADS threads. Each process warms up before taking traffic. On
+SIGTERM (or Ctrl+C) it stops accepting connections and finishes in-flight
+requests. It then drains background work: running recommendation tasks are
+allowed to finish, and pending search history is written (server.shutdown).
+
+gunicorn can also be started directly: gunicorn 'wsgi:create_app()'
+
+?async=1 recommendation tasks live in the process that accepted them, so
+polling needs WEB_WORKERS=1 (scale with WEB_THREADS) or sticky sessions.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+
+from dotenv import load_dotenv
+
+# Before the settings below and the project modules, which read theirs on import
+load_dotenv()
+
+import logs
+
+log = logging.getLogger(__name__)
+
+HOST = os.getenv('WEB_HOST', '0.0.0.0')
+PORT = int(os.getenv('WEB_PORT', '5000'))
+WORKERS = int(os.getenv('WEB_WORKERS', '1'))
+THREADS = int(os.getenv('WEB_THREADS', '16'))
+# The synchronous recommendation endpoints scrape every board before answering
+TIMEOUT = int(os.getenv('WEB_TIMEOUT', '120'))
+GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+# Recycle a worker after this many requests (0 = never)
+MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+# Production logging default: problems only, nothing per request (LOG_LEVEL overrides)
+LOG_LEVEL = 'WARNING'
+
+
+def create_app():
+    """Import and warm up the app. Runs once per worker process, after the fork."""
+    # server.py starts its background threads on import; threads don't survive
+    # a fork, so every worker imports it itself (no preload_app)
+    logs.configure(default_level=LOG_LEVEL)
+    import server
+    server.warm_up()
+    return server.app
+
+
+def shutdown():
+    """Drain the app's background work, if this process loaded it."""
+    server = sys.modules.get('server')
+    if server is not None:
+        server.shutdown()
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                'bind': f"{HOST}:{PORT}",
+                'workers': WORKERS,
+                'threads': THREADS,
+                'worker_class': 'gthread',
+                'timeout': TIMEOUT,
+                'graceful_timeout': GRACEFUL_TIMEOUT,
+                'keepalive': 5,
+                'max_requests': MAX_REQUESTS,
+                'max_requests_jitter': MAX_REQUESTS // 10,
+                'preload_app': False,
+                'worker_exit': lambda arbiter, worker: shutdown(),
+            }.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return create_app()
+
+    log.info("✓ Starting gunicorn on %s:%s: %d workers x %d threads", HOST, PORT, WORKERS, THREADS)
+    Application().run()
+
+
+def run_waitress():
+    from waitress import create_server
+
+    server = create_server(create_app(), host=HOST, port=PORT, threads=THREADS, channel_timeout=TIMEOUT)
+
+    def stop(signum, frame):
+        log.warning("⚠ Received signal %s, finishing in-flight requests...", signum)
+        # Stop listening; the loop ends when open connections finish. The close runs on
+        # the event loop (through its trigger): closing the socket here, while select()
+        # is interrupted, makes the retried select() fail with EBADF
+        threading.Thread(target=server.trigger.pull_trigger, args=(server.close,), daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    log.info("✓ Starting waitress on %s:%s: %d threads", HOST, PORT, THREADS)
+    try:
+        server.run()
+    finally:
+        shutdown()
+
+
+if __name__ == "__main__":
+    # Before any worker starts; the configure() in create_app then keeps these settings
+    logs.configure(default_level=LOG_LEVEL)
+    default = 'waitress' if sys.platform == 'win32' else 'gunicorn'
+    server_name = os.getenv('WEB_SERVER', default).lower()
+    if server_name == 'gunicorn':
+        run_gunicorn()
+    elif server_name == 'waitress':
+        run_waitress()
+    else:
+        log.error("✗ Unknown WEB_SERVER: %s (use gunicorn or waitress)", server_name)
+        sys.exit(1)